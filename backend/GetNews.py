@@ -1,19 +1,127 @@
 import requests
-from datetime import datetime, timedelta
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import Future
+from datetime import date, datetime, timedelta, timezone
 import json
-from typing import List, Dict, Optional
+import threading
+import time
+from typing import List, Dict, Optional, Tuple
 import os
 from flask import jsonify
 
+from news_store import ArticleStore, match_query
+
+DEFAULT_TIMEOUT = (3.05, 10)  # (connect, read) seconds
+DEFAULT_CACHE_TTL = 3600  # seconds
+DEFAULT_BASE_URL = "https://newsapi.org/v2"
+ACADEMIC_TERMS = ("research", "education", "study", "discovery", "development")
+
+
+def _build_session(pool_size: int = 10) -> requests.Session:
+    """
+    HTTP session with a keep-alive connection pool, so repeated NewsAPI
+    calls skip the TCP/TLS handshake.
+    """
+    session = requests.Session()
+    retry = Retry(total=2, backoff_factor=0.3, status_forcelist=(502, 503, 504))
+    adapter = HTTPAdapter(
+        pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+# Shared by every GetNewsContent instance in the process
+_session = _build_session()
+
 
 class GetNewsContent:
-    def __init__(self, api_key: str):
+    def __init__(
+        self,
+        api_key: str,
+        cache_ttl: int = DEFAULT_CACHE_TTL,
+        timeout: Tuple[float, float] = DEFAULT_TIMEOUT,
+        session: Optional[requests.Session] = None,
+        base_url: str = DEFAULT_BASE_URL,
+        store: Optional[ArticleStore] = None,
+    ):
         """
         Initialize with NewsAPI key
         Get your API key from: https://newsapi.org/
+
+        Responses are cached in memory for cache_ttl seconds, keyed by the
+        normalized query parameters, and identical requests that are in
+        flight at the same time share a single HTTP call. With a store,
+        every article is also kept on disk and subject queries are answered
+        from it, calling NewsAPI only for days it doesn't cover yet.
         """
         self.api_key = api_key
-        self.base_url = "https://newsapi.org/v2"
+        self.base_url = base_url.rstrip("/")
+        self.cache_ttl = cache_ttl
+        self.timeout = timeout
+        self.session = session or _session
+        self.store = store
+        self._cache: Dict[str, Tuple[float, List[Dict]]] = {}
+        self._in_flight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _cache_key(endpoint: str, params: Dict) -> str:
+        public_params = {k: v for k, v in params.items() if k != "apiKey"}
+        return f"{endpoint}?{json.dumps(public_params, sort_keys=True)}"
+
+    def _fetch_articles(
+        self, endpoint: str, params: Dict, refresh: bool = False
+    ) -> List[Dict]:
+        """
+        GET an endpoint and return its articles, served from the cache when
+        possible (refresh=True skips the cache read but still updates it).
+        Errors are raised to every caller waiting on the request and are
+        never cached.
+        """
+        key = self._cache_key(endpoint, params)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached and cached[0] > time.monotonic() and not refresh:
+                return cached[1]
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._in_flight[key] = future
+
+        if not owner:
+            return future.result()
+
+        try:
+            response = self.session.get(
+                f"{self.base_url}/{endpoint}", params=params, timeout=self.timeout
+            )
+            response.raise_for_status()
+            articles = response.json()["articles"]
+        except Exception as e:
+            with self._lock:
+                del self._in_flight[key]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._cache[key] = (time.monotonic() + self.cache_ttl, articles)
+            del self._in_flight[key]
+            self._evict_expired()
+        future.set_result(articles)
+        return articles
+
+    def _evict_expired(self):
+        now = time.monotonic()
+        for key in [k for k, (expires, _) in self._cache.items() if expires <= now]:
+            del self._cache[key]
+
+    def clear_cache(self):
+        with self._lock:
+            self._cache.clear()
 
     def _is_educational_safe(self, article: Dict) -> bool:
         # Add implementation for content safety checking
@@ -30,13 +138,27 @@ class GetNewsContent:
         max_articles: int = 5,
         language: str = "en",
         safe_mode: bool = True,
+        refresh: bool = False,
     ) -> Dict:
         """
         Get news articles relevant to a specific subject.
         """
-        end_date = datetime.now()
+        end_date = datetime.now(timezone.utc)
         start_date = end_date - timedelta(days=days_back)
-        academic_query = f"{subject} AND (research OR education OR study OR discovery OR development)"
+        # NewsAPI queries are case-insensitive, normalize so they share a cache entry
+        subject = " ".join(subject.lower().split())
+        academic_query = f"{subject} AND ({' OR '.join(ACADEMIC_TERMS)})"
+        if self.store is not None:
+            return self._stored_subject_news(
+                subject,
+                academic_query,
+                start_date.date(),
+                end_date.date(),
+                max_articles,
+                language,
+                safe_mode,
+                refresh,
+            )
 
         params = {
             "q": academic_query,
@@ -49,9 +171,7 @@ class GetNewsContent:
         }
 
         try:
-            response = requests.get(f"{self.base_url}/everything", params=params)
-            response.raise_for_status()
-            articles = response.json()["articles"]
+            articles = self._fetch_articles("everything", params, refresh)
 
             if safe_mode:
                 articles = [
@@ -64,8 +184,64 @@ class GetNewsContent:
             print(f"Error fetching news: {e}")
             return {}
 
+    def _stored_subject_news(
+        self,
+        subject: str,
+        academic_query: str,
+        start: date,
+        end: date,
+        max_articles: int,
+        language: str,
+        safe_mode: bool,
+        refresh: bool,
+    ) -> Dict:
+        """
+        get_subject_news through the article store: NewsAPI is asked only
+        for the span of days the store hasn't covered for this query, then
+        the answer comes from the store's full-text index.
+        """
+        query_key = f"everything:{language}:{academic_query}"
+        match = match_query(subject, ACADEMIC_TERMS)
+        if refresh:
+            missing = self.store.missing_days(query_key, start, end, 0)
+        else:
+            missing = self.store.missing_days(
+                query_key, start, end, self.cache_ttl, match, max_articles
+            )
+        if missing:
+            params = {
+                "q": academic_query,
+                "from": missing[0].strftime("%Y-%m-%d"),
+                "to": missing[-1].strftime("%Y-%m-%d"),
+                "language": language,
+                "sortBy": "relevancy",
+                "pageSize": max_articles,
+                "apiKey": self.api_key,
+            }
+            try:
+                articles = self._fetch_articles("everything", params, refresh)
+                covered = tuple(
+                    missing[0] + timedelta(days=i)
+                    for i in range((missing[-1] - missing[0]).days + 1)
+                )
+                self.store.add(articles, query_key, covered_days=covered)
+            except requests.exceptions.RequestException as e:
+                # Whatever the store already has is still better than nothing
+                print(f"Error fetching news: {e}")
+
+        articles = self.store.search(match, start, end, max_articles, query_key)
+        if safe_mode:
+            articles = [
+                article for article in articles if self._is_educational_safe(article)
+            ]
+        return self._format_for_lesson_plan(articles) if articles else {}
+
     def get_current_events(
-        self, category: Optional[str] = None, country: str = "us", max_articles: int = 5
+        self,
+        category: Optional[str] = None,
+        country: str = "us",
+        max_articles: int = 5,
+        refresh: bool = False,
     ) -> Dict:
         """
         Get top current events, optionally filtered by category.
@@ -75,9 +251,16 @@ class GetNewsContent:
             params["category"] = category
 
         try:
-            response = requests.get(f"{self.base_url}/top-headlines", params=params)
-            response.raise_for_status()
-            return self._format_for_lesson_plan(response.json()["articles"])
+            articles = self._fetch_articles("top-headlines", params, refresh)
+            if self.store is not None:
+                # Kept so later subject searches can find them too
+                self.store.add(
+                    articles,
+                    f"top-headlines:{country}:{category or ''}",
+                    category=category or "general",
+                    replace=True,
+                )
+            return self._format_for_lesson_plan(articles)
         except requests.exceptions.RequestException as e:
             print(f"Error fetching current events: {e}")
             return {}
@@ -99,6 +282,7 @@ def main():
     print(science_news)
     print(current_events)
 
+
 def get():
     # Get API key from environment variable
     api_key = os.getenv("NEWSAPI_KEY")
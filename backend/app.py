@@ -1,23 +1,144 @@
-from flask import Flask, request, jsonify
+from flask import (
+    Flask,
+    Request,
+    Response,
+    g,
+    request,
+    jsonify,
+    stream_with_context,
+    url_for,
+)
 import os
 from dotenv import load_dotenv
 from flask_cors import CORS
-from GetNews import GetNewsContent
+from werkzeug.exceptions import RequestEntityTooLarge
+from GetNews import DEFAULT_BASE_URL as NEWS_API_BASE_URL
+from GetNews import DEFAULT_CACHE_TTL, GetNewsContent
+from llm_fanout import (
+    DEFAULT_CHUNK_SLIDES,
+    DEFAULT_MAX_CONCURRENCY,
+    DEFAULT_REQUESTS_PER_MINUTE,
+    LLMLimiter,
+    chunk_page_runs,
+    chunk_pages,
+    fan_out,
+    format_chunk,
+    merge_slide_suggestions,
+    normalize_slide_suggestion,
+    parse_slide_suggestions,
+)
+from document_store import DEFAULT_MAX_AGE as DOCUMENT_MAX_AGE
+from document_store import DEFAULT_MAX_BYTES as DOCUMENT_STORE_MAX_BYTES
+from document_store import DEFAULT_MAX_UPLOAD_BYTES
+from document_store import (
+    DocumentNotFound,
+    DocumentStore,
+    InvalidUpload,
+    UploadTooLarge,
+)
+from ingest import DEFAULT_CONCURRENCY as DEFAULT_INGEST_CONCURRENCY
+from ingest import DEFAULT_MAX_BYTES as INGEST_MAX_BYTES
+from ingest import DEFAULT_MAX_FILES as INGEST_MAX_FILES
+from ingest import IngestError, check_limits, choose_analysis, list_archive, summarize
+from jobs import (
+    DEFAULT_QUEUE_SIZE,
+    DEFAULT_WORKERS,
+    JobCancelled,
+    JobManager,
+    JobShare,
+    QueueFull,
+)
+from llm_cache import DEFAULT_MAX_BYTES as LLM_CACHE_MAX_BYTES
+from llm_cache import DEFAULT_TTL as LLM_CACHE_TTL
+from llm_cache import CompletionCache, completion_key
+from llm_stream import SlideSuggestionStream, sse_event
+from metrics import (
+    bind_context,
+    metrics,
+    record_span,
+    span,
+    start_profile,
+    stop_profile,
+    timed_pages,
+)
+from text_index import (
+    INDEX_VERSION,
+    build_text_index,
+    diff_pages,
+    index_pages,
+    page_fingerprints,
+)
+from prompt_budget import (
+    DEFAULT_TOKEN_BUDGET,
+    build_prompt,
+    clean_pages,
+    compact_news,
+    count_tokens,
+    format_news,
+    rank_news,
+)
+from news_store import DEFAULT_MAX_AGE_DAYS as NEWS_MAX_AGE_DAYS
+from news_store import ArticleStore
+from news_prefetch import (
+    DEFAULT_CANDIDATES,
+    DEFAULT_INTERVAL,
+    NewsPrefetcher,
+    load_categories,
+)
 from openai import OpenAI, OpenAIError
 import base64
-from pptx import Presentation
-from PIL import Image
-import io
+import hashlib
 import traceback
-import PyPDF2
-from pptx import Presentation
-from pptx.enum.shapes import MSO_SHAPE_TYPE
-from PIL import Image
-import io
 import json
-from pdf2image import convert_from_path
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+from render import (
+    DEFAULT_PROFILE,
+    get_profile,
+    image_mime,
+    get_pdf_page_count,
+    get_pptx_slide_count,
+    render_pdf_range,
+    render_pptx_range,
+)
+from render_cache import DEFAULT_MAX_BYTES, RenderCache, hash_file, render_key
+from workers import DEFAULT_MAX_RSS_MB, DEFAULT_TIMEOUT, DocumentWorkerPool
+
+
+class UploadRequest(Request):
+    """
+    Request whose multipart files are streamed straight into the document
+    store while they are parsed, instead of being spooled to memory or a
+    second temporary file. Unclaimed uploads are removed with the request.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.uploads = []
+
+    def _get_file_stream(
+        self, total_content_length, content_type, filename=None, content_length=None
+    ):
+        if self.endpoint == "submit_ingest":
+            # Archives are neither PDFs nor PPTXs, and are bounded by the
+            # request limit; their members are checked one by one
+            upload = document_store.open_upload(max_bytes=0, check_type=False)
+        else:
+            upload = document_store.open_upload()
+        self.uploads.append(upload)
+        return upload
+
+    def close(self):
+        super().close()
+        for upload in self.uploads:
+            upload.close()
+
 
 app = Flask(__name__)
+app.request_class = UploadRequest
 
 # Simple CORS configuration
 CORS(app, supports_credentials=True)
@@ -32,6 +153,17 @@ TEMP_DIR = "temp"  # Add this line
 
 ALLOWED_EXTENSIONS = {"pdf", "pptx"}
 
+# Largest single upload; whole requests may add a little form data on top
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", DEFAULT_MAX_UPLOAD_BYTES))
+MAX_REQUEST_BYTES = MAX_UPLOAD_BYTES + 1024 * 1024
+# Bulk ingest requests carry many files or archives at once
+INGEST_MAX_REQUEST_BYTES = int(os.getenv("INGEST_MAX_REQUEST_BYTES", INGEST_MAX_BYTES))
+# Werkzeug enforces the larger limit on every body it reads, read_uploads()
+# the smaller one on requests that aren't bulk ingests
+app.config["MAX_CONTENT_LENGTH"] = max(MAX_REQUEST_BYTES, INGEST_MAX_REQUEST_BYTES)
+# Uploads with more pages are rejected before anything is extracted or rendered
+MAX_DOCUMENT_PAGES = int(os.getenv("MAX_DOCUMENT_PAGES", 500))
+
 
 if not os.path.exists(UPLOAD_FOLDER):
     os.makedirs(UPLOAD_FOLDER)
@@ -39,6 +171,81 @@ if not os.path.exists(TEMP_DIR):
     os.makedirs(TEMP_DIR)
 
 
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    # ?profile=1 returns a timing breakdown of the request's stages
+    g.profile = None
+    if request.args.get("profile", "").lower() in ("1", "true"):
+        g.profile = start_profile()
+
+
+@app.before_request
+def read_uploads():
+    """
+    Stream multipart uploads into the document store before the view runs,
+    so oversized or unsupported files are rejected before any work starts.
+    """
+    if (request.content_length or 0) > request_limit():
+        raise RequestEntityTooLarge()
+    if request.mimetype == "multipart/form-data":
+        request.files  # parses the body, writing files through UploadRequest
+
+
+def request_limit():
+    """Largest request body the endpoint accepts"""
+    if request.endpoint == "submit_ingest":
+        return INGEST_MAX_REQUEST_BYTES
+    return MAX_REQUEST_BYTES
+
+
+@app.errorhandler(RequestEntityTooLarge)
+def request_too_large(e):
+    limit = request_limit()
+    return jsonify({"error": f"Request is larger than the {limit} byte limit"}), 413
+
+
+@app.errorhandler(InvalidUpload)
+def invalid_upload(e):
+    return upload_error(e)
+
+
+def upload_error(e):
+    return jsonify({"error": str(e)}), 413 if isinstance(e, UploadTooLarge) else 400
+
+
+@app.after_request
+def record_request(response):
+    # For streamed responses this is the time until the headers are sent
+    seconds = time.perf_counter() - g.get("request_start", time.perf_counter())
+    endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+    metrics.observe(
+        "request_duration_seconds",
+        seconds,
+        help="Time to handle each endpoint",
+        endpoint=endpoint,
+        method=request.method,
+        status=response.status_code,
+    )
+
+    spans = g.get("profile")
+    if spans is not None and not response.is_streamed:
+        response.headers["Server-Timing"] = ", ".join(
+            [f"{s['stage']};dur={s['ms']}" for s in spans]
+            + [f"total;dur={round(seconds * 1000, 2)}"]
+        )
+        data = response.get_json(silent=True) if response.is_json else None
+        if isinstance(data, dict):
+            data["profile"] = {"total_ms": round(seconds * 1000, 2), "spans": spans}
+            response.set_data(json.dumps(data))
+    return response
+
+
+@app.teardown_request
+def end_profile(exc):
+    stop_profile()
+
+
 def allowed_file(filename):
     return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
 
@@ -49,146 +256,518 @@ if not OPENAI_API_KEY:
 if not NEWS_API_KEY:
     raise ValueError("NEWS_API_KEY not found in environment variables")
 
+# Rendered slide images, keyed by file content and render settings
+render_cache = RenderCache(
+    os.path.join(TEMP_DIR, "render_cache"),
+    max_bytes=int(os.getenv("RENDER_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES)),
+)
+
+# Every article fetched, full-text indexed, so overlapping subjects share them
+article_store = ArticleStore(
+    os.path.join(TEMP_DIR, "news.sqlite3"),
+    max_age_days=int(os.getenv("NEWS_MAX_AGE_DAYS", NEWS_MAX_AGE_DAYS)),
+)
+
+# One long-lived news client per process so the HTTP pool and cache are shared
+news = GetNewsContent(
+    NEWS_API_KEY,
+    cache_ttl=int(os.getenv("NEWS_CACHE_TTL", DEFAULT_CACHE_TTL)),
+    base_url=os.getenv("NEWS_API_BASE_URL", NEWS_API_BASE_URL),
+    store=article_store,
+)
+
+# Keeps popular subjects warm in the background, plus the categories.txt
+# categories if NEWS_PREFETCH_CATEGORIES=1 (no handler reads them by default).
+# NEWS_CANDIDATES articles are fetched per subject and ranked against each document
+news_prefetcher = NewsPrefetcher(
+    news,
+    (
+        load_categories(os.path.join(os.path.dirname(__file__), "categories.txt"))
+        if os.getenv("NEWS_PREFETCH_CATEGORIES", "0") == "1"
+        else []
+    ),
+    interval=int(os.getenv("NEWS_PREFETCH_INTERVAL", DEFAULT_INTERVAL)),
+    background=os.getenv("NEWS_PREFETCH", "1") != "0",
+    max_articles=int(os.getenv("NEWS_CANDIDATES", DEFAULT_CANDIDATES)),
+)
+
+# Shared pool for independent request stages (news fetch, parsing, rendering)
+pipeline_pool = ThreadPoolExecutor(
+    max_workers=int(os.getenv("PIPELINE_WORKERS", 8)), thread_name_prefix="pipeline"
+)
+
+# Renders the pages a viewer is likely to open next, off the request threads
+prefetch_pool = ThreadPoolExecutor(
+    max_workers=int(os.getenv("PAGE_PREFETCH_WORKERS", 2)),
+    thread_name_prefix="prefetch",
+)
+PAGE_PREFETCH = int(os.getenv("PAGE_PREFETCH", 2))
+MAX_PAGE_PREFETCH = int(os.getenv("MAX_PAGE_PREFETCH", 10))
+prefetch_lock = threading.Lock()
+prefetching = set()
+# (document_id, profile) pairs whose unchanged pages were already copied over,
+# oldest first; only the latest CARRIED_OVER_MAX are remembered
+CARRIED_OVER_MAX = 4096
+carried_over_lock = threading.Lock()
+carried_over = OrderedDict()
+
+# Bounds concurrent model calls and their rate across every request and job;
+# chat_completion and chat_completion_stream send every uncached call through it
+llm_limiter = LLMLimiter(
+    max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY)),
+    requests_per_minute=int(
+        os.getenv("LLM_REQUESTS_PER_MINUTE", DEFAULT_REQUESTS_PER_MINUTE)
+    ),
+)
+LLM_CHUNK_SLIDES = int(os.getenv("LLM_CHUNK_SLIDES", DEFAULT_CHUNK_SLIDES))
+
+# Render profile of the preview image attached to model calls
+LLM_VISION_PROFILE = os.getenv("LLM_VISION_PROFILE", "llm-vision")
+
+# Files of a bulk ingest analyzed at once; their model calls still share llm_limiter
+INGEST_CONCURRENCY = int(os.getenv("INGEST_CONCURRENCY", DEFAULT_INGEST_CONCURRENCY))
+
+# Revised decks reuse the previous version's suggestions for unchanged slides,
+# unless more than this share of the slides changed
+INCREMENTAL_MAX_CHANGED = float(os.getenv("INCREMENTAL_MAX_CHANGED", 0.5))
+
+# Upper bound on prompt size; the least relevant document pages are cut first
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", DEFAULT_TOKEN_BUDGET))
+
+# Completions keyed by model, final prompt and image, persisted across restarts
+completion_cache = CompletionCache(
+    os.path.join(TEMP_DIR, "llm_cache.sqlite3"),
+    ttl=int(os.getenv("LLM_CACHE_TTL", LLM_CACHE_TTL)),
+    max_bytes=int(os.getenv("LLM_CACHE_MAX_BYTES", LLM_CACHE_MAX_BYTES)),
+)
+
+# Uploads are stored once by content hash and referred to by document ID
+document_store = DocumentStore(
+    os.path.join(TEMP_DIR, "documents"),
+    max_age=int(os.getenv("DOCUMENT_MAX_AGE", DOCUMENT_MAX_AGE)),
+    max_bytes=int(os.getenv("DOCUMENT_STORE_MAX_BYTES", DOCUMENT_STORE_MAX_BYTES)),
+    max_upload_bytes=MAX_UPLOAD_BYTES,
+)
+
+# Background workers for long-running analyses submitted through /jobs
+job_manager = JobManager(
+    workers=int(os.getenv("JOB_WORKERS", DEFAULT_WORKERS)),
+    queue_size=int(os.getenv("JOB_QUEUE_SIZE", DEFAULT_QUEUE_SIZE)),
+)
+
+# Separate processes for CPU-bound parsing and rendering, off the request threads
+document_workers = DocumentWorkerPool(
+    workers=int(os.getenv("DOCUMENT_WORKERS", os.cpu_count() or 1)),
+    timeout=float(os.getenv("DOCUMENT_TASK_TIMEOUT", DEFAULT_TIMEOUT)),
+    max_rss_mb=float(os.getenv("DOCUMENT_WORKER_MAX_RSS_MB", DEFAULT_MAX_RSS_MB)),
+)
+
 # Initialize OpenAI client with proper authentication
+# OPENAI_BASE_URL points it at a compatible server, e.g. the benchmark stand-in
 client = OpenAI(
     api_key=OPENAI_API_KEY,
+    base_url=os.getenv("OPENAI_BASE_URL") or None,
 )
 
 
-def convert_pptx_to_image(pptx_path, slide_index=0):
-    """Convert a PowerPoint slide to an image"""
-    try:
-        from PIL import Image, ImageDraw, ImageFont
-
-        prs = Presentation(pptx_path)
-        if slide_index >= len(prs.slides):
-            raise ValueError("Slide index out of range")
-
-        slide = prs.slides[slide_index]
-
-        # Get slide dimensions
-        width = int(prs.slide_width * 96 / 914400)  # convert EMU to pixels
-        height = int(prs.slide_height * 96 / 914400)
-
-        # Create a new image with white background
-        slide_image = Image.new("RGB", (width, height), "white")
-        draw = ImageDraw.Draw(slide_image)
-
-        # Process all shapes on the slide
-        for shape in slide.shapes:
-            # Handle text boxes
-            if hasattr(shape, "text"):
-                left = int(shape.left * 96 / 914400)
-                top = int(shape.top * 96 / 914400)
-                try:
-                    # Draw text (basic implementation)
-                    draw.text((left, top), shape.text, fill="black")
-                except Exception as e:
-                    print(f"Error drawing text: {e}")
-
-            # Handle pictures
-            if shape.shape_type == MSO_SHAPE_TYPE.PICTURE:
-                try:
-                    image = Image.open(io.BytesIO(shape.image.blob))
-                    left = int(shape.left * 96 / 914400)
-                    top = int(shape.top * 96 / 914400)
-                    width = int(shape.width * 96 / 914400)
-                    height = int(shape.height * 96 / 914400)
-                    image = image.resize((width, height))
-                    slide_image.paste(image, (left, top))
-                except Exception as e:
-                    print(f"Error processing image: {e}")
-
-        # Save to buffer
-        image_stream = io.BytesIO()
-        slide_image.save(image_stream, format="PNG")
-        image_stream.seek(0)
-        return image_stream.getvalue()
+def count_pages(count_fn, file_path):
+    with span("page_count") as sizes:
+        sizes["pages"] = document_workers.run(count_fn, file_path)
+    return sizes["pages"]
+
+
+def document_page_count(file_path, extension, file_hash=None):
+    """
+    Page/slide count read from the file without rendering anything, cached
+    once for every render profile.
+    """
+    count_fn = get_pptx_slide_count if extension == "pptx" else get_pdf_page_count
+    return render_cache.get_count(
+        render_key(file_hash or hash_file(file_path), kind=extension),
+        lambda: count_pages(count_fn, file_path),
+    )
+
+
+def slides_key(file_hash, extension, profile=DEFAULT_PROFILE):
+    """Render cache namespace of a document's page images in one profile"""
+    return render_key(file_hash, kind=extension, **get_profile(profile))
+
+
+def pdf_slides(file_path, start=0, end=None, file_hash=None, profile=DEFAULT_PROFILE):
+    """Page count and a (page_index, image_bytes) iterator served from the render cache"""
+    settings = get_profile(profile)
+    file_hash = file_hash or hash_file(file_path)
+    doc_key = slides_key(file_hash, "pdf", profile)
+    count = document_page_count(file_path, "pdf", file_hash)
+    end = count if end is None else min(end, count)
+
+    def render_range(first, last):
+        return timed_pages(
+            "rasterization",
+            document_workers.iter_page_chunks(
+                render_pdf_range,
+                file_path,
+                first,
+                last,
+                page_count=count,
+                **settings,
+            ),
+        )
 
-    except Exception as e:
-        print(f"Error converting PowerPoint to image: {str(e)}")
-        traceback.print_exc()
-        raise
+    return count, render_cache.iter_pages(doc_key, render_range, start, end)
 
 
-def convert_pdf_to_image(pdf_path, page_number=0):
-    images = convert_from_path(pdf_path)  # returns list of PIL images
-    if page_number >= len(images):
-        raise ValueError("Page number out of range")
-    image_stream = io.BytesIO()
-    images[page_number].save(image_stream, format="PNG")
-    image_stream.seek(0)
-    return image_stream.getvalue()
+def pptx_slides(file_path, start=0, end=None, file_hash=None, profile=DEFAULT_PROFILE):
+    """Slide count and a (slide_index, image_bytes) iterator served from the render cache"""
+    # Slides are always drawn at SLIDE_DPI, the profile's dpi doesn't apply
+    settings = {k: v for k, v in get_profile(profile).items() if k != "dpi"}
+    file_hash = file_hash or hash_file(file_path)
+    doc_key = slides_key(file_hash, "pptx", profile)
+    count = document_page_count(file_path, "pptx", file_hash)
+    end = count if end is None else min(end, count)
 
+    def render_range(first, last):
+        return timed_pages(
+            "rasterization",
+            document_workers.iter_page_chunks(
+                render_pptx_range, file_path, first, last, **settings
+            ),
+        )
 
-def generate_lesson(file_path, prompt):
+    return count, render_cache.iter_pages(doc_key, render_range, start, end)
+
+
+def document_slides(document, start=0, end=None, profile=DEFAULT_PROFILE):
+    """
+    Page images of a stored document. Its ID is already the SHA-256 of
+    the file, so the file isn't hashed again.
+    """
+    carry_over_pages(document, profile)
+    slides = pptx_slides if document["extension"] == "pptx" else pdf_slides
+    return slides(
+        document["path"],
+        start,
+        end,
+        file_hash=document["document_id"],
+        profile=profile,
+    )
+
+
+def previous_version(document):
+    """The earlier version the request named, if it is still stored"""
+    previous_id = document.get("previous_id")
+    if not previous_id:
+        return None
     try:
-        extension = file_path.rsplit(".", 1)[1].lower()
-        base64_image = ""
-        text_content = ""
-
-        # Convert file to images
-        if extension == "pptx":
-            # Extract text from PPT
-            prs = Presentation(file_path)
-            slides_text = []
-            for i, slide in enumerate(prs.slides):
-                # capture shape text
-                slide_text = []
-                for shape in slide.shapes:
-                    if hasattr(shape, "text"):
-                        slide_text.append(shape.text)
-                slides_text.append(" ".join(slide_text))
-
-            # Convert only first slide to image (example)
-            image_data = convert_pptx_to_image(file_path, 0)
-            base64_image = base64.b64encode(image_data).decode("utf-8")
-            text_content = "\n".join(slides_text)
-
-        elif extension == "pdf":
-            # Extract text from PDF
-            with open(file_path, "rb") as f:
-                pdf_reader = PyPDF2.PdfReader(f)
-                for page in pdf_reader.pages:
-                    text_content += page.extract_text() or ""
-
-            # Convert only first page to image (example)
-            image_data = convert_pdf_to_image(file_path, 0)
+        previous = document_store.get(previous_id)
+    except DocumentNotFound:
+        return None
+    if previous["extension"] != document["extension"]:
+        return None
+    previous["path"] = document_store.path(previous_id)
+    return previous
+
+
+def carry_over_pages(document, profile=DEFAULT_PROFILE):
+    """
+    Copy the cached images of pages unchanged since the previous version
+    of a document into its own render cache namespace, so only the changed
+    pages get rendered. Runs once per document and profile.
+    """
+    key = (document["document_id"], profile)
+    with carried_over_lock:
+        if not document.get("previous_id") or key in carried_over:
+            return
+    previous = previous_version(document)
+    if previous is None:
+        return
+
+    with span("render_reuse") as sizes:
+        diff = diff_pages(
+            document_fingerprints(previous), document_fingerprints(document)
+        )
+        old_key = slides_key(previous["document_id"], previous["extension"], profile)
+        new_key = slides_key(document["document_id"], document["extension"], profile)
+        sizes["pages"] = 0
+        for new_index, old_index in diff["unchanged"].items():
+            if render_cache.contains(f"{new_key}-{new_index}"):
+                continue
+            image_data = render_cache.get(f"{old_key}-{old_index}")
+            if image_data is not None:
+                render_cache.put(f"{new_key}-{new_index}", image_data)
+                sizes["pages"] += 1
+
+    with carried_over_lock:
+        carried_over[key] = True
+        while len(carried_over) > CARRIED_OVER_MAX:
+            carried_over.popitem(last=False)
+
+
+def request_render_profile():
+    """
+    The render profile a request asked for with "render_profile"; raises
+    ValueError for unknown names.
+    """
+    name = request.args.get("render_profile") or request.form.get(
+        "render_profile", DEFAULT_PROFILE
+    )
+    get_profile(name)
+    return name
+
+
+def request_prefetch():
+    """
+    How many pages past the requested ones to render in the background,
+    from "prefetch" (default PAGE_PREFETCH, at most MAX_PAGE_PREFETCH).
+    """
+    return max(
+        0, min(int(request.args.get("prefetch", PAGE_PREFETCH)), MAX_PAGE_PREFETCH)
+    )
+
+
+def prefetch_pages(document, start, end, profile=DEFAULT_PROFILE):
+    """
+    Render pages [start, end) into the render cache in the background.
+    Pages that are already cached or being prefetched are skipped.
+    """
+    end = min(
+        end,
+        document_page_count(
+            document["path"], document["extension"], document["document_id"]
+        ),
+    )
+    doc_key = slides_key(document["document_id"], document["extension"], profile)
+    with prefetch_lock:
+        missing = [
+            index
+            for index in range(start, end)
+            if (doc_key, index) not in prefetching
+            and not render_cache.contains(f"{doc_key}-{index}")
+        ]
+        if not missing:
+            return
+        prefetching.update((doc_key, index) for index in missing)
+
+    def run():
+        try:
+            _, pages = document_slides(document, missing[0], missing[-1] + 1, profile)
+            for _ in pages:
+                pass
+        except Exception as e:
+            print(f"Error prefetching pages: {str(e)}")
+        finally:
+            with prefetch_lock:
+                prefetching.difference_update((doc_key, index) for index in missing)
+
+    prefetch_pool.submit(run)
+
+
+def prefetch_after(pages, document, start, end, profile=DEFAULT_PROFILE):
+    """Pass pages through, then prefetch [start, end) once they are all rendered"""
+    yield from pages
+    prefetch_pages(document, start, end, profile)
+
+
+def first_slide(slides):
+    _, pages = slides
+    for _, image_data in pages:
+        return image_data
+    raise ValueError("Document has no pages")
+
+
+def run_concurrently(*stages):
+    """
+    Run independent pipeline stages on the shared pool and return their
+    results in order. Every stage is waited for before an error is raised,
+    so callers can safely clean up files the stages are reading.
+    """
+    futures = [pipeline_pool.submit(bind_context(stage)) for stage in stages]
+    wait(futures)
+    return [future.result() for future in futures]
+
+
+def build_index(file_path, reuse=None):
+    """Per-page text index, built in a worker process"""
+    with span("text_extraction") as sizes:
+        index = document_workers.run(build_text_index, file_path, reuse)
+        sizes.update(
+            pages=len(index["pages"]), chars=index["length"], reused=index["reused"]
+        )
+    return index
+
+
+def extract_pages(file_path):
+    """Extract the text of each page/slide of a PDF or PPTX file"""
+    return index_pages(build_index(file_path))
+
+
+def render_preview(file_path):
+    """Render only the first page/slide, the image sent to the vision model"""
+    extension = file_path.rsplit(".", 1)[1].lower()
+    if extension == "pptx":
+        return first_slide(pptx_slides(file_path, 0, 1, profile=LLM_VISION_PROFILE))
+    elif extension == "pdf":
+        return first_slide(pdf_slides(file_path, 0, 1, profile=LLM_VISION_PROFILE))
+    else:
+        raise Exception("Invalid file format")
+
+
+def chat_completion(prompt, image_data=None, max_tokens=1000, model="gpt-4o-mini"):
+    """
+    Run a single-message completion, optionally with a PNG attached, and
+    return (content, cached). Identical requests are served from the
+    completion cache.
+    """
+    key = completion_key(model, prompt, image_data, max_tokens)
+    content = completion_cache.get(key)
+    if content is not None:
+        return content, True
+
+    messages = chat_messages(prompt, image_data)
+    prompt_tokens = log_request(prompt, image_data, max_tokens, model)
+    with llm_limiter.slot(), span("llm_call", prompt_tokens=prompt_tokens) as sizes:
+        response = client.chat.completions.create(
+            model=model,
+            messages=messages,
+            max_tokens=max_tokens,
+        )
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            sizes["completion_tokens"] = usage.completion_tokens
+    content = response.choices[0].message.content
+    completion_cache.put(key, content)
+    return content, False
+
+
+def log_request(prompt, image_data, max_tokens, model):
+    """Log the size of a model request and return its prompt tokens"""
+    prompt_tokens = count_tokens(prompt, model)
+    print(
+        f"OpenAI request: {model}, {prompt_tokens} prompt tokens, "
+        f"max_tokens={max_tokens}, image={image_data is not None}"
+    )
+    return prompt_tokens
+
+
+def chat_messages(prompt, image_data):
+    """The single user message for a completion"""
+    if image_data is None:
+        message_content = prompt
+    else:
+        with span("base64_encoding", bytes=len(image_data)):
             base64_image = base64.b64encode(image_data).decode("utf-8")
-        else:
-            raise Exception("Invalid file format")
+        message_content = [
+            {"type": "text", "text": prompt},
+            {
+                "type": "image_url",
+                "image_url": {
+                    "url": f"data:{image_mime(image_data)};base64,{base64_image}"
+                },
+            },
+        ]
+    return [{"role": "user", "content": message_content}]
+
+
+def chat_completion_stream(
+    prompt, image_data=None, max_tokens=1000, model="gpt-4o-mini"
+):
+    """
+    Streaming chat_completion: returns (cached, iterator of text pieces) and
+    yields tokens as the model produces them. A cached reply comes back as a
+    single piece. The reply is only cached once it has streamed completely.
+    """
+    key = completion_key(model, prompt, image_data, max_tokens)
+    content = completion_cache.get(key)
+    if content is not None:
+        return True, iter([content])
+
+    messages = chat_messages(prompt, image_data)
+    prompt_tokens = log_request(prompt, image_data, max_tokens, model)
+
+    def deltas():
+        parts = []
+        # The call holds its limiter slot until the reply has streamed
+        with llm_limiter.slot():
+            start = time.perf_counter()
+            response = client.chat.completions.create(
+                model=model,
+                messages=messages,
+                max_tokens=max_tokens,
+                stream=True,
+            )
+            for chunk in response:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    parts.append(delta)
+                    yield delta
+        content = "".join(parts)
+        record_span(
+            "llm_call",
+            time.perf_counter() - start,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=count_tokens(content, model),
+        )
+        completion_cache.put(key, content)
+
+    return False, deltas()
+
+
+def compose_prompt(instructions, file_path, pages, heading, subject_news, subject):
+    """
+    Compact news and document text into a prompt within PROMPT_TOKEN_BUDGET
+    and log how much it saved.
+    """
+    separator = "\n" if file_path.rsplit(".", 1)[1].lower() == "pptx" else ""
+    with span("prompt_build") as sizes:
+        prompt, report = build_prompt(
+            instructions,
+            pages,
+            heading,
+            subject_news=subject_news,
+            subject=subject,
+            budget=PROMPT_TOKEN_BUDGET,
+            separator=separator,
+        )
+        sizes.update(tokens=report["prompt_tokens"], raw_tokens=report["raw_tokens"])
+    print(
+        f"Prompt compacted from {report['raw_tokens']} to "
+        f"{report['prompt_tokens']} tokens ({report['pages_kept']}/"
+        f"{report['pages_total']} pages, {report['news_articles']} articles)"
+    )
+    return prompt
+
+
+def generate_lesson(
+    file_path, prompt, pages=None, image_data=None, subject_news=None, subject=""
+):
+    try:
+        # Text extraction and the preview render don't depend on each other
+        if pages is None and image_data is None:
+            pages, image_data = run_concurrently(
+                lambda: extract_pages(file_path), lambda: render_preview(file_path)
+            )
+        elif pages is None:
+            pages = extract_pages(file_path)
+        elif image_data is None:
+            image_data = render_preview(file_path)
 
         # Add file content to the prompt
-        prompt_with_file = f"{prompt}\n\nFile text:\n{text_content}"
-
-        # Create message with text + base64 data
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {
-                    "role": "user",
-                    "content": [
-                        {"type": "text", "text": prompt_with_file},
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:image/png;base64,{base64_image}"
-                            },
-                        },
-                    ],
-                }
-            ],
-            max_tokens=1000,
+        prompt_with_file = compose_prompt(
+            prompt, file_path, pages, "File text:", subject_news, subject
         )
 
-        response_content = response.choices[0].message.content
+        # Create message with text + image, or reuse a cached completion
+        response_content, cached = chat_completion(prompt_with_file, image_data)
         try:
-            json_response = json.loads(response_content)
-            return json_response
+            with span("json_parse", chars=len(response_content)):
+                json_response = json.loads(response_content)
+            return json_response, cached
         except json.JSONDecodeError:
             return [
                 {"slide": 1, "suggestions": [{"content": response_content, "link": ""}]}
-            ]
+            ], cached
 
     except FileNotFoundError:
         raise Exception("File not found")
@@ -200,32 +779,66 @@ def generate_lesson(file_path, prompt):
         raise Exception(f"Error processing file: {str(e)}")
 
 
-def generate_w_pdfs(file_path, prompt):
+def analyze_chunk(prompt, first_index, pages, image_data=None):
+    """Ask the model for suggestions on one chunk of slides"""
+    chunk_prompt = (
+        f"{prompt}\n\nOnly suggest changes for the slides below, "
+        f"using their slide numbers.\n\n{format_chunk(first_index, pages)}"
+    )
+    content, cached = chat_completion(chunk_prompt, image_data)
+    with span("json_parse", chars=len(content)):
+        suggestions = parse_slide_suggestions(content, first_index + 1)
+    return suggestions, cached
+
+
+def generate_lesson_per_slide(prompt, pages, image_data=None, job=None, chunks=None):
+    """
+    Analyze a deck chunk by chunk in parallel and merge the per-slide
+    suggestions, so long decks aren't truncated to a single reply. chunks
+    limits the analysis to some of the slides.
+    """
+    if chunks is None:
+        chunks = chunk_pages(pages, LLM_CHUNK_SLIDES)
+    if job:
+        job.update(llm_calls_total=len(chunks))
+
+    cached_chunks = []
+
+    def analyze(first_index, chunk):
+        if job:
+            job.raise_if_cancelled()
+        # The preview image only belongs with the chunk that has the first slide
+        chunk_image = image_data if first_index == 0 else None
+        result, cached = analyze_chunk(prompt, first_index, chunk, chunk_image)
+        cached_chunks.append(cached)
+        if job:
+            job.increment("llm_calls_done")
+        return result
+
     try:
-        # Read the PDF file
-        with open(file_path, "rb") as file:
-            # Create PDF reader object
-            pdf_reader = PyPDF2.PdfReader(file)
+        merged = fan_out(chunks, bind_context(analyze), llm_limiter.max_concurrency)
+        return merged, bool(cached_chunks) and all(cached_chunks)
+    except OpenAIError as e:
+        raise Exception(f"OpenAI API error: {str(e)}")
 
-            # Extract text from all pages
-            text_content = ""
-            for page in pdf_reader.pages:
-                text_content += page.extract_text()
 
-        # Create message with the extracted text
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",  # Make sure to use an appropriate model
-            messages=[
-                {
-                    "role": "user",
-                    "content": f"{prompt}\n\nHere is the syllabus content:\n{text_content}",
-                }
-            ],
-            max_tokens=1000,
+def generate_w_pdfs(file_path, prompt, pages=None, subject_news=None, subject=""):
+    try:
+        if pages is None:
+            pages = extract_pages(file_path)
+
+        # Create message with the extracted text, or reuse a cached completion
+        return chat_completion(
+            compose_prompt(
+                prompt,
+                file_path,
+                pages,
+                "Here is the syllabus content:",
+                subject_news,
+                subject,
+            )
         )
 
-        return response.choices[0].message.content
-
     except FileNotFoundError:
         raise Exception("File not found")
     except OpenAIError as e:
@@ -234,34 +847,500 @@ def generate_w_pdfs(file_path, prompt):
         raise Exception(f"Error processing file: {str(e)}")
 
 
-@app.route("/lesson-plan", methods=["POST"])
-def suggest():
+def wants_event_stream(data=None):
+    """Check whether the client asked for model output as server-sent events"""
+    value = request.args.get("stream") or (data or request.form).get("stream", "")
+    accept = request.headers.get("Accept", "")
+    return str(value).lower() == "sse" or "text/event-stream" in accept
+
+
+def event_stream(generate):
+    return Response(
+        generate(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def wants_stream():
+    """Check whether the client asked for slides as an NDJSON stream"""
+    value = request.args.get("stream") or request.form.get("stream", "")
+    return value.lower() in ("1", "true", "ndjson")
+
+
+def to_data_url(image_data, mime_type=None):
+    with span("base64_encoding", bytes=len(image_data)):
+        base64_image = base64.b64encode(image_data).decode("utf-8")
+    return f"data:{mime_type or image_mime(image_data)};base64,{base64_image}"
+
+
+def slide_transport():
+    """
+    How the client wants slide images: "data-url" (base64 inside the JSON,
+    the default), "binary" (URLs of /documents/<id>/pages/<index>) or
+    "multipart" (one multipart/mixed response with the raw images).
+    """
+    value = request.args.get("transport") or request.form.get("transport", "")
+    if not value and "multipart/mixed" in request.headers.get("Accept", ""):
+        return "multipart"
+    return value.lower() if value.lower() in ("binary", "multipart") else "data-url"
+
+
+def page_url(document_id, index, profile=DEFAULT_PROFILE):
+    if profile != DEFAULT_PROFILE:
+        return url_for(
+            "document_page",
+            document_id=document_id,
+            index=index,
+            render_profile=profile,
+        )
+    return url_for("document_page", document_id=document_id, index=index)
+
+
+def slides_response(document_id, slide_count, pages, profile=DEFAULT_PROFILE, start=0):
+    """
+    Non-streaming /convert-* reply. In binary mode the pages are rendered
+    into the cache but only their URLs are sent.
+    """
+    transport = slide_transport()
+    if transport == "multipart":
+        return multipart_slides(document_id, slide_count, pages, profile)
+    slides = []
+    for index, image_data in pages:
+        if transport == "binary":
+            slides.append(page_url(document_id, index, profile))
+        else:
+            slides.append(to_data_url(image_data))
+    return jsonify(
+        {
+            "slides": slides,
+            "document_id": document_id,
+            "page_count": slide_count,
+            "start": start,
+        }
+    )
+
+
+def multipart_slides(document_id, slide_count, slide_iter, profile=DEFAULT_PROFILE):
+    """
+    Stream the raw images as multipart/mixed parts, one per slide, as they
+    are rendered. The image bytes are written as they are, never copied or
+    encoded.
+    """
+    boundary = f"slide-{uuid.uuid4().hex}"
+
+    def generate():
+        for index, image_data in slide_iter:
+            yield (
+                f"--{boundary}\r\n"
+                f"Content-Type: {image_mime(image_data)}\r\n"
+                f"Content-Length: {len(image_data)}\r\n"
+                f"X-Page-Index: {index}\r\n"
+                f"Content-Location: {page_url(document_id, index, profile)}\r\n\r\n"
+            ).encode("ascii")
+            yield image_data
+            yield b"\r\n"
+        yield f"--{boundary}--\r\n".encode("ascii")
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype=f"multipart/mixed; boundary={boundary}",
+        headers={
+            "X-Document-Id": document_id,
+            "X-Page-Count": str(slide_count),
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+
+def stream_slides(document_id, slide_count, slide_iter, profile=DEFAULT_PROFILE):
+    """
+    Send each slide as its own NDJSON line as soon as it is rendered, so the
+    client can show slide 1 while the rest of the deck is still rendering.
+    """
+    binary = slide_transport() == "binary"
+
+    def generate():
+        try:
+            yield json.dumps({"count": slide_count, "document_id": document_id})
+            yield "\n"
+            for index, image_data in slide_iter:
+                if binary:
+                    entry = {
+                        "index": index,
+                        "url": page_url(document_id, index, profile),
+                    }
+                else:
+                    entry = {"index": index, "slide": to_data_url(image_data)}
+                yield json.dumps(entry)
+                yield "\n"
+            yield json.dumps({"done": True}) + "\n"
+        except Exception as e:
+            print(f"Error streaming slides: {str(e)}")
+            traceback.print_exc()
+            yield json.dumps({"error": str(e)}) + "\n"
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def check_page_limit(path, extension, document_id):
+    """
+    Reject a new upload with more than MAX_DOCUMENT_PAGES pages before it is
+    stored. The count is cached, rendering the document later reuses it.
+    """
     try:
-        if "file" not in request.files:
-            return jsonify({"error": "No file uploaded"}), 400
+        pages = document_page_count(path, extension, document_id)
+    except Exception as e:
+        raise InvalidUpload(f"Could not read the {extension.upper()} file: {e}")
+    if MAX_DOCUMENT_PAGES and pages > MAX_DOCUMENT_PAGES:
+        raise UploadTooLarge(
+            f"Document has {pages} pages, at most {MAX_DOCUMENT_PAGES} are allowed"
+        )
 
-        file = request.files["file"]
-        subject = request.form.get("subject", "")
 
-        if not file or not subject:
-            return jsonify({"error": "File and subject are required"}), 400
+def store_upload(stream, filename):
+    """Store an upload; InvalidUpload if its type, size or page count is off"""
+    with span("upload_save") as sizes:
+        document = document_store.put(stream, filename, validate=check_page_limit)
+        sizes["bytes"] = document["size"]
+    return document
+
+
+def request_document(data=None):
+    """
+    The document a request refers to: a new upload in the "file" field,
+    stored once in the document store, or the "document_id" of an earlier
+    upload. A "previous_document_id" names the earlier version of it the
+    client uploaded, for incremental rendering and analysis. Returns
+    (document, error_response).
+    """
+    data = data if data is not None else request.form
+    file = request.files.get("file")
+    if file and file.filename:
+        # The type comes from the content; the filename may say anything
+        try:
+            document = store_upload(file.stream, file.filename)
+        except InvalidUpload as e:
+            return None, upload_error(e)
+    elif data.get("document_id"):
+        try:
+            document = document_store.get(data["document_id"])
+        except DocumentNotFound as e:
+            return None, (jsonify({"error": str(e)}), 404)
+    else:
+        return None, (jsonify({"error": "No file uploaded"}), 400)
+
+    previous_id = data.get("previous_document_id")
+    if previous_id and previous_id != document["document_id"]:
+        try:
+            document_store.get(previous_id)
+        except DocumentNotFound as e:
+            return None, (jsonify({"error": str(e)}), 404)
+        document["previous_id"] = previous_id
+
+    document["path"] = document_store.path(document["document_id"])
+    return document, None
+
+
+def document_text_index(document):
+    """
+    Per-page text index of a stored document, built once. Pages unchanged
+    since the previous version named by the request are reused, not
+    re-extracted.
+    """
+
+    def build():
+        reuse = None
+        previous_index = document_store.peek_artifact(
+            document.get("previous_id"), "text_index"
+        )
+        previous = previous_version(document) if previous_index else None
+        if previous is not None and previous_index.get("version") == INDEX_VERSION:
+            diff = diff_pages(
+                document_fingerprints(previous), document_fingerprints(document)
+            )
+            texts = index_pages(previous_index)
+            reuse = {new: texts[old] for new, old in diff["unchanged"].items()}
+        return build_index(document["path"], reuse)
+
+    return document_store.artifact(document["document_id"], "text_index", build)
+
+
+def document_fingerprints(document):
+    """
+    Page fingerprints of a stored document, computed once and only when it
+    is compared with another version
+    """
+
+    def build():
+        with span("page_fingerprints") as sizes:
+            fingerprints = document_workers.run(page_fingerprints, document["path"])
+            sizes["pages"] = len(fingerprints)
+        return fingerprints
+
+    return document_store.artifact(
+        document["document_id"], f"fingerprints-v{INDEX_VERSION}", build
+    )
+
+
+def document_pages(document):
+    """Per-page text of a stored document, extracted once"""
+    return index_pages(document_text_index(document))
+
+
+LESSON_PLAN_PROMPT = 'Analyze this lesson plan give me suggested changes based on these recent news articles: {subject_news}. Focus on incorporating current research trends and modern teaching methodologies in education. The changes will be returned in this format: { "slide": <slide_number>, "suggestions": [ { "content": <suggestion_text>, "link": <source_link> } ] }Only return json format'
+
+
+def suggestions_artifact(subject, mode=""):
+    subject = " ".join(subject.lower().split())
+    key = hashlib.sha256(f"{subject}\0{mode}".encode("utf-8")).hexdigest()[:16]
+    return f"suggestions-{key}"
+
+
+def save_suggestions(document, subject, mode, suggestion):
+    """
+    Keep a lesson plan's suggestions, so the next version of the deck can
+    reuse them for the slides it didn't change.
+    """
+    document_store.put_artifact(
+        document["document_id"],
+        suggestions_artifact(subject, mode),
+        {"suggestion": suggestion},
+    )
+
+
+def previous_suggestions(document, subject, mode=""):
+    """
+    Suggestions saved for the previous version of the deck. Only per-slide
+    results cover every slide, so the default single reply isn't reused.
+    """
+    if mode != "per-slide":
+        return None
+    return document_store.peek_artifact(
+        document.get("previous_id"), suggestions_artifact(subject, mode)
+    )
+
+
+def run_incremental_lesson_plan(
+    document, subject, previous, mode="", job=None, subject_news=None
+):
+    """
+    Re-analyze only the slides that changed since the previous version of
+    the deck and reuse its suggestions for the others, renumbered to their
+    new positions. Returns None when the previous version is no longer
+    stored, or so much changed that a full analysis is the better deal.
+    """
+    previous_document = previous_version(document)
+    if previous_document is None:
+        return None
+    fingerprints = document_fingerprints(document)
+    diff = diff_pages(document_fingerprints(previous_document), fingerprints)
+    changed = diff["changed"]
+    if len(changed) > len(fingerprints) * INCREMENTAL_MAX_CHANGED:
+        return None
+    if job:
+        job.update(slides_changed=len(changed), slides_reused=len(diff["unchanged"]))
+
+    previous_items = [
+        normalize_slide_suggestion(item, 1) for item in previous["suggestion"]
+    ]
+    by_slide = {}
+    for item in filter(None, previous_items):
+        by_slide.setdefault(item["slide"], []).extend(item["suggestions"])
+    reused = [
+        {"slide": new_index + 1, "suggestions": by_slide[old_index + 1]}
+        for new_index, old_index in sorted(diff["unchanged"].items())
+        if old_index + 1 in by_slide
+    ]
+
+    fresh, cached = [], True
+    if changed:
+        pages = clean_pages(document_pages(document))
+        if subject_news is None:
+            subject_news = fetch_news(subject)
+        changed_pages = [pages[i] for i in changed]
+        prompt = LESSON_PLAN_PROMPT.replace(
+            "{subject_news}",
+            format_news(compact_news(rank_news(subject_news, changed_pages))),
+        )
+        # The preview image is only needed if the first slide changed
+        image_data = None
+        if changed[0] == 0:
+            image_data = first_slide(
+                document_slides(document, 0, 1, LLM_VISION_PROFILE)
+            )
+        fresh, cached = generate_lesson_per_slide(
+            prompt,
+            pages,
+            image_data,
+            job,
+            chunks=chunk_page_runs(pages, changed, LLM_CHUNK_SLIDES),
+        )
+
+    print(
+        f"Incremental analysis: {len(changed)} of {len(fingerprints)} slides "
+        f"changed since {document['previous_id'][:12]}"
+    )
+    result = {
+        "suggestion": merge_slide_suggestions([reused, fresh]),
+        "cached": cached,
+        "document_id": document["document_id"],
+        "incremental": {
+            "previous_id": document["previous_id"],
+            "slides_total": len(fingerprints),
+            "slides_changed": len(changed),
+            "slides_reused": len(diff["unchanged"]),
+            "slides_removed": len(diff["removed"]),
+        },
+    }
+    if mode:
+        result["mode"] = mode
+    return result
+
+
+def fetch_news(subject):
+    with span("news_fetch") as sizes:
+        subject_news = news_prefetcher.get_subject_news(subject, days_back=7)
+        sizes["articles"] = len((subject_news or {}).get("articles") or [])
+    return subject_news
+
+
+def prepare_lesson_plan(document, subject, subject_news=None):
+    """
+    News, per-page text and preview image for a lesson-plan analysis. News
+    already fetched for the subject (e.g. once for a whole batch) is reused.
+    """
+    # The news fetch, text extraction and preview render are independent
+    return run_concurrently(
+        lambda: fetch_news(subject) if subject_news is None else subject_news,
+        lambda: document_pages(document),
+        lambda: first_slide(document_slides(document, 0, 1, LLM_VISION_PROFILE)),
+    )
+
+
+def stream_lesson_plan(document, subject, mode=""):
+    """
+    /lesson-plan as server-sent events: a "suggestion" event for every slide
+    object as soon as the model has closed it, then "done" with the full
+    list, or "error".
+    """
+    try:
+        yield ": started\n\n"
+        if mode == "per-slide":
+            # Chunks finish out of order, and a revised deck only re-analyzes
+            # its changed slides, so these results arrive merged
+            result = run_lesson_plan(document, subject, mode)
+            for item in result["suggestion"]:
+                yield sse_event("suggestion", item)
+            yield sse_event("done", result)
+            return
+
+        subject_news, pages, image_data = prepare_lesson_plan(document, subject)
+        prompt = compose_prompt(
+            LESSON_PLAN_PROMPT,
+            document["path"],
+            pages,
+            "File text:",
+            subject_news,
+            subject,
+        )
+        cached, deltas = chat_completion_stream(prompt, image_data)
+        parser = SlideSuggestionStream()
+        for delta in deltas:
+            for item in parser.feed(delta):
+                yield sse_event("suggestion", item)
+        for item in parser.close():
+            yield sse_event("suggestion", item)
+        yield sse_event(
+            "done",
+            {
+                "suggestion": parser.suggestions,
+                "cached": cached,
+                "document_id": document["document_id"],
+            },
+        )
+    except Exception as e:
+        print(f"Error streaming lesson plan: {str(e)}")
+        traceback.print_exc()
+        yield sse_event("error", {"error": str(e)})
+
+
+def run_lesson_plan(document, subject, mode="", job=None, subject_news=None):
+    """
+    Full /lesson-plan analysis of a stored document. When run as a
+    background job, progress is reported on the job and cancellation is
+    honoured between stages.
+    """
+    previous = previous_suggestions(document, subject, mode)
+    if previous:
+        result = run_incremental_lesson_plan(
+            document, subject, previous, mode, job, subject_news
+        )
+        if result is not None:
+            save_suggestions(document, subject, mode, result["suggestion"])
+            return result
+
+    file_path = document["path"]
+    subject_news, pages, image_data = prepare_lesson_plan(
+        document, subject, subject_news
+    )
+    if job:
+        job.update(pages_parsed=len(pages), slides_rendered=1)
+        job.raise_if_cancelled()
+
+    # Per-slide mode fans the deck out over several smaller model calls
+    if mode == "per-slide":
+        cleaned = clean_pages(pages)
+        prompt = LESSON_PLAN_PROMPT.replace(
+            "{subject_news}",
+            format_news(compact_news(rank_news(subject_news, cleaned))),
+        )
+        response, cached = generate_lesson_per_slide(prompt, cleaned, image_data, job)
+        save_suggestions(document, subject, mode, response)
+        return {
+            "suggestion": response,
+            "mode": "per-slide",
+            "cached": cached,
+            "document_id": document["document_id"],
+        }
+
+    if job:
+        job.update(llm_calls_total=1)
+    response, cached = generate_lesson(
+        file_path, LESSON_PLAN_PROMPT, pages, image_data, subject_news, subject
+    )
+    if job:
+        job.increment("llm_calls_done")
+    # The response is already a Python object, no need to parse it again
+    print(response[0])
+    return {
+        "suggestion": [response[0]],
+        "cached": cached,
+        "document_id": document["document_id"],
+    }
 
-        file_path = os.path.join(TEMP_DIR, file.filename)
-        file.save(file_path)
 
-        news = GetNewsContent(NEWS_API_KEY)
-        subject_news = news.get_subject_news(subject, days_back=7)
+@app.route("/lesson-plan", methods=["POST"])
+def suggest():
+    try:
+        subject = request.form.get("subject", "")
+        if not subject:
+            return jsonify({"error": "File and subject are required"}), 400
 
-        if not os.path.exists(file_path):
-            return jsonify({"error": "File not found"}), 404
+        document, error = request_document()
+        if error:
+            return error
 
-        prompt = 'Analyze this lesson plan give me suggested changes based on these recent news articles: {subject_news}. Focus on incorporating current research trends and modern teaching methodologies in education. The changes will be returned in this format: { "slide": <slide_number>, "suggestions": [ { "content": <suggestion_text>, "link": <source_link> } ] }Only return json format'
+        mode = request.form.get("mode", "")
+        if wants_event_stream():
+            return event_stream(lambda: stream_lesson_plan(document, subject, mode))
 
-        response = generate_lesson(file_path, prompt)
-        # The response is already a Python object, no need to parse it again
-        print(response[0])
-        os.remove(file_path)
-        return jsonify({"suggestion": [response[0]]})
+        response = run_lesson_plan(document, subject, mode)
+        return jsonify(response)
 
     except OpenAIError as e:
         print(f"OpenAI API Error: {str(e)}")
@@ -271,96 +1350,509 @@ def suggest():
         return jsonify({"error": str(e)}), 500
 
 
-@app.route("/convert-pptx", methods=["POST"])
-def convert_pptx():
+@app.route("/jobs/lesson-plan", methods=["POST"])
+def submit_lesson_plan_job():
+    """Queue a /lesson-plan analysis and return its job ID right away"""
     try:
-        if "file" not in request.files:
-            return jsonify({"error": "No file uploaded"}), 400
+        subject = request.form.get("subject", "")
+        mode = request.form.get("mode", "")
+        if not subject:
+            return jsonify({"error": "File and subject are required"}), 400
 
-        file = request.files["file"]
-        if file.filename == "":
-            return jsonify({"error": "No selected file"}), 400
+        document, error = request_document()
+        if error:
+            return error
 
-        # Save the file temporarily
-        file_path = os.path.join(TEMP_DIR, file.filename)
-        file.save(file_path)
+        try:
+            job = job_manager.submit(
+                "lesson-plan", lambda job: run_lesson_plan(document, subject, mode, job)
+            )
+        except QueueFull as e:
+            return jsonify({"error": str(e)}), 503
 
-        # Convert slides to images
-        prs = Presentation(file_path)
-        slides = []
+        return jsonify(job.to_dict()), 202
 
-        for i in range(len(prs.slides)):
-            image_data = convert_pptx_to_image(file_path, i)
-            base64_image = base64.b64encode(image_data).decode("utf-8")
-            slides.append(f"data:image/png;base64,{base64_image}")
+    except Exception as e:
+        print(f"Error in /jobs/lesson-plan endpoint: {str(e)}")
+        traceback.print_exc()
+        return jsonify({"error": str(e)}), 500
+
+
+def request_ingest_files():
+    """
+    Store every file of a bulk ingest request: "archive" uploads (zip or
+    tar), "files" uploads and "document_ids" of earlier uploads. Returns
+    manifest entries; unsupported, oversized or unreadable files are marked
+    "skipped".
+    """
+    max_files = int(os.getenv("INGEST_MAX_FILES", INGEST_MAX_FILES))
+    max_bytes = int(os.getenv("INGEST_MAX_BYTES", INGEST_MAX_BYTES))
+    # The whole batch is counted and looked up before any of it is stored,
+    # so a rejected batch leaves nothing behind
+    members = [
+        member
+        for archive in request.files.getlist("archive")
+        for member in list_archive(archive.stream)
+    ]
+    files = [file for file in request.files.getlist("files") if file.filename]
+    document_ids = ",".join(request.form.getlist("document_ids"))
+    documents = [
+        document_store.get(document_id)
+        for document_id in filter(None, (d.strip() for d in document_ids.split(",")))
+    ]
+    check_limits(
+        len(members) + len(files) + len(documents),
+        sum(size for _, size, _ in members),
+        max_files,
+        max_bytes,
+    )
+
+    uploads = [(filename, open_member) for filename, _, open_member in members]
+    uploads += [(file.filename, lambda file=file: file.stream) for file in files]
+    entries = []
+    for filename, open_upload in uploads:
+        if not allowed_file(filename):
+            entries.append({"filename": filename, "status": "skipped"})
+            continue
+        try:
+            with open_upload() as stream:
+                document = store_upload(stream, filename)
+        except InvalidUpload as e:
+            entries.append({"filename": filename, "status": "skipped", "error": str(e)})
+            continue
+        entries.append({"filename": filename, "document": document})
+
+    for document in documents:
+        entries.append({"filename": document["filename"], "document": document})
+    return entries
+
+
+def run_ingest(entries, subject, analysis, mode, job):
+    """
+    Analyze a batch of stored files for one subject. News is fetched once
+    for the whole batch, the files are parsed, rendered and analyzed
+    INGEST_CONCURRENCY at a time, and identical files are analyzed once.
+    Returns a manifest with one entry per file.
+    """
+    pending = [entry for entry in entries if "document" in entry]
+    job.update(
+        files_total=len(entries),
+        files_done=0,
+        files_failed=0,
+        files_skipped=len(entries) - len(pending),
+    )
+    subject_news = fetch_news(subject)
+    job.raise_if_cancelled()
+
+    def analyze(key):
+        document, kind = key
+        job.raise_if_cancelled()
+        document = dict(document, path=document_store.path(document["document_id"]))
+        if kind == "lesson-plan":
+            return run_lesson_plan(
+                document, subject, mode, job=JobShare(job), subject_news=subject_news
+            )
+        return run_content_suggest(document, subject, subject_news)
+
+    # Same bytes and analysis share one run, whatever the file is called
+    runs = {}
+    for entry in pending:
+        document = entry["document"]
+        kind = choose_analysis(analysis, document["extension"])
+        entry["analysis"] = kind
+        runs.setdefault((document["document_id"], kind), (document, kind))
+
+    results = {}
+    with ThreadPoolExecutor(
+        max_workers=INGEST_CONCURRENCY, thread_name_prefix="ingest"
+    ) as pool:
+        futures = {
+            pool.submit(bind_context(analyze), run): run_key
+            for run_key, run in runs.items()
+        }
+        for future in as_completed(futures):
+            run_key = futures[future]
+            try:
+                results[run_key] = {"status": "succeeded", "result": future.result()}
+            except JobCancelled:
+                raise
+            except Exception as e:
+                print(f"Error ingesting {run_key[0]}: {str(e)}")
+                results[run_key] = {"status": "failed", "error": str(e)}
+            done = sum(
+                1
+                for entry in pending
+                if (entry["document"]["document_id"], entry["analysis"]) == run_key
+            )
+            job.increment(
+                (
+                    "files_done"
+                    if results[run_key]["status"] == "succeeded"
+                    else "files_failed"
+                ),
+                done,
+            )
+
+    files = []
+    for entry in entries:
+        if "document" not in entry:
+            files.append(
+                {
+                    "filename": entry["filename"],
+                    "status": "skipped",
+                    "error": entry.get(
+                        "error", "Only PDF and PPTX files are supported"
+                    ),
+                }
+            )
+            continue
+        document = entry["document"]
+        run_key = (document["document_id"], entry["analysis"])
+        files.append(
+            {
+                "filename": entry["filename"],
+                "document_id": document["document_id"],
+                "analysis": entry["analysis"],
+                **results[run_key],
+            }
+        )
+    return {"subject": subject, "summary": summarize(files), "files": files}
+
+
+@app.route("/ingest", methods=["POST"])
+def submit_ingest():
+    """
+    Queue a bulk analysis of many syllabi and decks for one subject and
+    return its job ID; progress and the manifest are read from /jobs.
+    """
+    try:
+        subject = request.form.get("subject", "")
+        analysis = request.form.get("analysis", "auto")
+        mode = request.form.get("mode", "")
+        if not subject:
+            return jsonify({"error": "Subject is required"}), 400
+
+        try:
+            choose_analysis(analysis, "pdf")
+            entries = request_ingest_files()
+        except IngestError as e:
+            return jsonify({"error": str(e)}), 400
+        except DocumentNotFound as e:
+            return jsonify({"error": str(e)}), 404
+        if not entries:
+            return jsonify({"error": "No files uploaded"}), 400
 
-        # Clean up
-        os.remove(file_path)
+        try:
+            job = job_manager.submit(
+                "ingest", lambda job: run_ingest(entries, subject, analysis, mode, job)
+            )
+        except QueueFull as e:
+            return jsonify({"error": str(e)}), 503
 
-        return jsonify({"slides": slides})
+        return jsonify(job.to_dict()), 202
 
     except Exception as e:
-        print(f"Error converting PPTX: {str(e)}")
+        print(f"Error in /ingest endpoint: {str(e)}")
+        traceback.print_exc()
         return jsonify({"error": str(e)}), 500
 
 
-@app.route("/convert-pdf", methods=["POST"])
-def convert_pdf():
-    try:
-        if "file" not in request.files:
-            return jsonify({"error": "No file uploaded"}), 400
+@app.route("/jobs/<job_id>", methods=["GET"])
+def get_job(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job.to_dict())
 
-        pdf_file = request.files["file"]
-        if pdf_file.filename == "":
-            return jsonify({"error": "No selected file"}), 400
 
-        file_path = os.path.join(TEMP_DIR, pdf_file.filename)
-        pdf_file.save(file_path)
+@app.route("/jobs/<job_id>", methods=["DELETE"])
+def cancel_job(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    job.cancel()
+    return jsonify(job.to_dict())
 
-        pdf_reader = PyPDF2.PdfReader(file_path)
-        slides = []
-        for i in range(len(pdf_reader.pages)):
-            image_data = convert_pdf_to_image(file_path, i)
-            base64_image = base64.b64encode(image_data).decode("utf-8")
-            slides.append(f"data:image/png;base64,{base64_image}")
 
-        os.remove(file_path)
-        return jsonify({"slides": slides})
+@app.route("/jobs/<job_id>/events", methods=["GET"])
+def job_events(job_id):
+    """Server-sent events with the job state every time it changes"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+
+    def generate():
+        version = -1
+        while True:
+            new_version = job.wait_for_change(version, timeout=15)
+            if new_version == version:
+                # Keep idle connections open through proxies
+                yield ": keep-alive\n\n"
+                continue
+            version = new_version
+            yield f"data: {json.dumps(job.to_dict())}\n\n"
+            if job.done:
+                return
+
+    return event_stream(generate)
+
+
+# Page images never change for a given document ID, so clients may keep them
+PAGE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+@app.route("/documents/<document_id>/pages/<int:index>", methods=["GET"])
+def document_page(document_id, index):
+    """A single rendered page/slide (0-based index) in the requested render profile"""
+    try:
+        document = document_store.get(document_id)
+        profile = request_render_profile()
+        prefetch = request_prefetch()
+    except DocumentNotFound as e:
+        return jsonify({"error": str(e)}), 404
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # The render cache key is content-addressed, so it doubles as the ETag
+    etag = f"{slides_key(document_id, document['extension'], profile)}-{index}"
+    document["path"] = document_store.path(document_id)
+    if etag in request.if_none_match:
+        response = Response(status=304)
+    else:
+        page_count, pages = document_slides(document, index, index + 1, profile)
+        if index >= page_count:
+            return jsonify({"error": "Page not found"}), 404
+        _, image_data = next(pages)
+        response = Response(image_data, mimetype=image_mime(image_data))
+    # Warm the next pages so paging through the viewer doesn't wait on them
+    prefetch_pages(document, index + 1, index + 1 + prefetch, profile)
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = PAGE_CACHE_CONTROL
+    return response
+
+
+@app.route("/documents/<document_id>/pages", methods=["GET"])
+def document_page_range(document_id):
+    """
+    Render pages [start, end) on demand (the first page by default), then
+    prefetch the next "prefetch" pages in the background.
+    """
+    try:
+        document = document_store.get(document_id)
+        profile = request_render_profile()
+        prefetch = request_prefetch()
+        start = int(request.args.get("start", 0))
+        end = int(request.args.get("end", start + 1))
+    except DocumentNotFound as e:
+        return jsonify({"error": str(e)}), 404
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if start < 0 or end <= start:
+        return jsonify({"error": "Invalid page range"}), 400
+
+    document["path"] = document_store.path(document_id)
+    page_count, pages = document_slides(document, start, end, profile)
+    if start >= page_count:
+        return jsonify({"error": "Page not found"}), 404
+    end = min(end, page_count)
+    pages = prefetch_after(pages, document, end, end + prefetch, profile)
+    if wants_stream() and slide_transport() != "multipart":
+        return stream_slides(document_id, page_count, pages, profile)
+    return slides_response(document_id, page_count, pages, profile, start)
+
+
+def document_metadata(document, profile=DEFAULT_PROFILE):
+    """Stored document metadata with its page count and page URLs; nothing is rendered"""
+    page_count = document_page_count(
+        document["path"], document["extension"], document["document_id"]
+    )
+    return {
+        "document_id": document["document_id"],
+        "filename": document["filename"],
+        "extension": document["extension"],
+        "size": document["size"],
+        "created_at": document["created_at"],
+        "previous_id": document.get("previous_id"),
+        "page_count": page_count,
+        "pages": [
+            page_url(document["document_id"], index, profile)
+            for index in range(page_count)
+        ],
+    }
+
+
+@app.route("/documents", methods=["POST"])
+def create_document():
+    """Store an upload and return its metadata right away"""
+    try:
+        try:
+            profile = request_render_profile()
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        document, error = request_document()
+        if error:
+            return error
+        # The page URLs don't name the previous version, so unchanged pages
+        # are copied over now rather than when they are fetched
+        carry_over_pages(document, profile)
+        return jsonify(document_metadata(document, profile))
 
     except Exception as e:
-        print(f"Error converting PDF: {str(e)}")
+        print(f"Error storing document: {str(e)}")
+        traceback.print_exc()
         return jsonify({"error": str(e)}), 500
 
 
-@app.route("/content-suggest", methods=["POST"])
-def content_suggest():
+@app.route("/documents/<document_id>", methods=["GET"])
+def get_document(document_id):
     try:
-        # Get the data from the request
-        data = request.get_json()
-        if not data or "filename" not in data or "subject" not in data:
-            return jsonify({"error": "Filename and subject are required"}), 400
+        document = document_store.get(document_id)
+        profile = request_render_profile()
+    except DocumentNotFound as e:
+        return jsonify({"error": str(e)}), 404
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    document["path"] = document_store.path(document_id)
+    return jsonify(document_metadata(document, profile))
+
+
+@app.route("/convert-pptx", methods=["POST"])
+def convert_pptx():
+    try:
+        try:
+            profile = request_render_profile()
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        document, error = request_document()
+        if error:
+            return error
+
+        # Parse the deck once and render every slide that isn't cached yet
+        slide_count, pages = document_slides(document, profile=profile)
+        if wants_stream() and slide_transport() != "multipart":
+            return stream_slides(document["document_id"], slide_count, pages, profile)
+        return slides_response(document["document_id"], slide_count, pages, profile)
 
-        # Get news for the specific subject
-        news = GetNewsContent(NEWS_API_KEY)
-        subject_news = news.get_subject_news(data["subject"], days_back=7)
+    except Exception as e:
+        print(f"Error converting PPTX: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/convert-pdf", methods=["POST"])
+def convert_pdf():
+    try:
+        try:
+            profile = request_render_profile()
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        document, error = request_document()
+        if error:
+            return error
+
+        # Render every page that isn't cached yet exactly once
+        page_count, pages = document_slides(document, profile=profile)
+        if wants_stream() and slide_transport() != "multipart":
+            return stream_slides(document["document_id"], page_count, pages, profile)
+        return slides_response(document["document_id"], page_count, pages, profile)
 
-        file_path = os.path.join(TEMP_DIR, data["filename"])  # Updated this line
+    except Exception as e:
+        print(f"Error converting PDF: {str(e)}")
+        return jsonify({"error": str(e)}), 500
 
-        if not os.path.exists(file_path):
-            return jsonify({"error": "File not found"}), 404
 
-        prompt = (
-            f"Analyze this syllabus and suggest improvements based on "
-            f"these recent news articles in {data['subject']}: {subject_news}. "
-            f"Focus on incorporating current trends if important to curriculumn "
-            f"modern teaching methodologies in {data['subject']} education."
-            f"Do not entire change the syllabus do not change structure of class do not change teaching style, only add on if necessary."
-            f"Be very specific and only return the suggestions straight to the point, and stay on the point no extra words other than suggestions"
+def content_suggest_prompt(subject):
+    return (
+        f"Analyze this syllabus and suggest improvements based on "
+        f"these recent news articles in {subject}: {{subject_news}}. "
+        f"Focus on incorporating current trends if important to curriculumn "
+        f"modern teaching methodologies in {subject} education."
+        f"Do not entire change the syllabus do not change structure of class do not change teaching style, only add on if necessary."
+        f"Be very specific and only return the suggestions straight to the point, and stay on the point no extra words other than suggestions"
+    )
+
+
+def prepare_content_suggest(document, subject, subject_news=None):
+    # Get news for the specific subject while the syllabus text is extracted
+    return run_concurrently(
+        lambda: fetch_news(subject) if subject_news is None else subject_news,
+        lambda: document_pages(document),
+    )
+
+
+def run_content_suggest(document, subject, subject_news=None):
+    """Full /content-suggest analysis of a stored syllabus"""
+    subject_news, pages = prepare_content_suggest(document, subject, subject_news)
+    response, cached = generate_w_pdfs(
+        document["path"],
+        content_suggest_prompt(subject),
+        pages,
+        subject_news,
+        subject,
+    )
+    return {
+        "suggestion": response,
+        "cached": cached,
+        "document_id": document["document_id"],
+    }
+
+
+def stream_content_suggest(document, subject):
+    """
+    /content-suggest as server-sent events: "token" events with the text as
+    the model writes it, then "done" with the full suggestion, or "error".
+    """
+    try:
+        yield ": started\n\n"
+        subject_news, pages = prepare_content_suggest(document, subject)
+        prompt = compose_prompt(
+            content_suggest_prompt(subject),
+            document["path"],
+            pages,
+            "Here is the syllabus content:",
+            subject_news,
+            subject,
         )
+        cached, deltas = chat_completion_stream(prompt)
+        parts = []
+        for delta in deltas:
+            parts.append(delta)
+            yield sse_event("token", {"text": delta})
+        yield sse_event(
+            "done",
+            {
+                "suggestion": "".join(parts),
+                "cached": cached,
+                "document_id": document["document_id"],
+            },
+        )
+    except Exception as e:
+        print(f"Error streaming content suggestions: {str(e)}")
+        traceback.print_exc()
+        yield sse_event("error", {"error": str(e)})
+
 
-        response = generate_w_pdfs(file_path, prompt)
-        os.remove(file_path)
-        return jsonify({"suggestion": response})
+@app.route("/content-suggest", methods=["POST"])
+def content_suggest():
+    try:
+        # Get the data from the request
+        data = request.get_json()
+        if not data or "subject" not in data:
+            return jsonify({"error": "Document and subject are required"}), 400
+        if "document_id" not in data:
+            # /upload keeps files in the document store, not under their names
+            if "filename" in data:
+                error = "Send the document_id returned by /upload instead of filename"
+                return jsonify({"error": error}), 400
+            return jsonify({"error": "Document and subject are required"}), 400
+
+        document, error = request_document(data)
+        if error:
+            return error
+        subject = data["subject"]
+        if wants_event_stream(data):
+            return event_stream(lambda: stream_content_suggest(document, subject))
+
+        return jsonify(run_content_suggest(document, subject))
 
     except OpenAIError as e:
         print(f"OpenAI API Error: {str(e)}")
@@ -375,10 +1867,6 @@ def content_suggest():
 @app.route("/upload", methods=["POST"])
 def upload_file():
     try:
-        print("Received request")
-        print("Request headers:", dict(request.headers))
-        print("Request files:", request.files)
-
         if "file" not in request.files:
             print("No file part in request")
             return {"error": "No file part"}, 400
@@ -396,20 +1884,17 @@ def upload_file():
         print(f"Processing file: {file.filename}")
         print(f"Subject: {subject}")
 
-        # Save the file using TEMP_DIR constant
-        file_path = os.path.join(TEMP_DIR, file.filename)
-        file.save(file_path)
-        print(f"File saved at: {file_path}")
-
-        # Read and print the first few bytes of the file (for debugging)
-        with open(file_path, "rb") as f:
-            content = f.read(100)
-        print(f"First 100 bytes: {content}")
+        # Store the upload once; later requests refer to it by document ID
+        document, error = request_document()
+        if error:
+            return error
+        print(f"Document stored: {document['document_id']}")
 
         response = jsonify(
             {
                 "message": "File processed successfully",
                 "filename": file.filename,
+                "document_id": document["document_id"],
                 "subject": subject,
             }
         )
@@ -421,6 +1906,40 @@ def upload_file():
         return {"error": str(e)}, 500
 
 
+@app.route("/render-cache/stats", methods=["GET"])
+def render_cache_stats():
+    return jsonify(render_cache.get_stats())
+
+
+@app.route("/llm-cache/stats", methods=["GET"])
+def llm_cache_stats():
+    return jsonify(completion_cache.get_stats())
+
+
+@app.route("/workers/stats", methods=["GET"])
+def workers_stats():
+    return jsonify(document_workers.get_stats())
+
+
+@app.route("/metrics", methods=["GET"])
+def prometheus_metrics():
+    """Stage and endpoint timings plus the cache and worker counters"""
+    gauges = {
+        "render_cache": render_cache.get_stats(),
+        "llm_cache": completion_cache.get_stats(),
+        "news": news_prefetcher.get_stats(),
+        "workers": document_workers.get_stats(),
+        "documents": document_store.get_stats(),
+        "jobs": job_manager.get_stats(),
+    }
+    return Response(metrics.render(gauges), mimetype="text/plain; version=0.0.4")
+
+
+@app.route("/news/stats", methods=["GET"])
+def news_stats():
+    return jsonify({**news_prefetcher.get_stats(), "store": article_store.get_stats()})
+
+
 @app.route("/")
 def home():
     return "Hello, Flask!"
@@ -0,0 +1,100 @@
+import io
+import os
+
+from PIL import Image, ImageDraw
+from pptx import Presentation
+from pptx.util import Inches
+
+PARAGRAPH = (
+    "Students review the main ideas of the unit, work through examples in "
+    "small groups and discuss how recent research changes the topic."
+)
+
+
+def _pdf_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_pdf(path: str, pages: int, nonce: str = "") -> str:
+    """
+    Write a text PDF with one lesson per page. Written by hand so the
+    benchmark needs nothing beyond the app's own dependencies.
+    """
+    objects = [b"", b"", b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for page in range(1, pages + 1):
+        lines = [f"Course Outline {nonce}", f"Week {page}: Lesson {page}"]
+        lines += [PARAGRAPH[i : i + 80] for i in range(0, len(PARAGRAPH), 80)] * 4
+        lines.append(f"Page {page} of {pages}")
+        text = " ".join(f"({_pdf_escape(line)}) '" for line in lines)
+        stream = f"BT /F1 12 Tf 72 740 Td 16 TL {text} ET".encode("latin-1")
+        objects.append(
+            b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream)
+        )
+        content_id = len(objects)
+        objects.append(
+            (
+                f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>"
+            ).encode("latin-1")
+        )
+        kids.append(len(objects))
+    objects[0] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    objects[1] = (
+        f"<< /Type /Pages /Kids [{' '.join(f'{kid} 0 R' for kid in kids)}] "
+        f"/Count {len(kids)} >>"
+    ).encode("latin-1")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1,
+        xref,
+    )
+    with open(path, "wb") as f:
+        f.write(out)
+    return path
+
+
+def _picture(page: int) -> io.BytesIO:
+    image = Image.new("RGB", (320, 240), (240, 240, 255))
+    draw = ImageDraw.Draw(image)
+    draw.rectangle([20, 20, 300, 220], outline=(40, 40, 160), width=4)
+    draw.text((40, 100), f"Figure {page}", fill=(0, 0, 0))
+    data = io.BytesIO()
+    image.save(data, format="PNG")
+    data.seek(0)
+    return data
+
+
+def make_pptx(path: str, pages: int, nonce: str = "") -> str:
+    """Write a deck with a title and bullet text on every slide and a picture on every fifth"""
+    prs = Presentation()
+    layout = prs.slide_layouts[1]
+    for page in range(1, pages + 1):
+        slide = prs.slides.add_slide(layout)
+        slide.shapes.title.text = f"Lesson {page} {nonce}".strip()
+        slide.placeholders[1].text = "\n".join(
+            [PARAGRAPH, f"Exercise {page}", "Discussion questions"]
+        )
+        if page % 5 == 1:
+            slide.shapes.add_picture(
+                _picture(page), Inches(6), Inches(4.5), width=Inches(3)
+            )
+    prs.save(path)
+    return path
+
+
+def make_document(directory: str, kind: str, pages: int, nonce: str = "") -> str:
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"bench-{pages}p{nonce}.{kind}")
+    if kind == "pdf":
+        return make_pdf(path, pages, nonce)
+    return make_pptx(path, pages, nonce)
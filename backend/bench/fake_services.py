@@ -0,0 +1,199 @@
+import json
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+
+def _reply_content(slides: int) -> str:
+    return json.dumps(
+        [
+            {
+                "slide": slide,
+                "suggestions": [
+                    {
+                        "content": f"Add a short activity on recent findings for slide {slide}.",
+                        "link": f"https://example.com/article/{slide}",
+                    }
+                ],
+            }
+            for slide in range(1, slides + 1)
+        ]
+    )
+
+
+def _articles(count: int, body_chars: int) -> List[Dict]:
+    # Recent enough for the article store to keep and search them
+    published = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    return [
+        {
+            "source": {"id": None, "name": "Bench News"},
+            "author": "Bench",
+            "title": f"Researchers publish study number {i}",
+            "description": "A new study looks at how students learn. " * 3,
+            "url": f"https://example.com/news/{i}",
+            "urlToImage": f"https://example.com/news/{i}.jpg",
+            "publishedAt": published,
+            "content": "x" * body_chars,
+        }
+        for i in range(count)
+    ]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, data, status=200):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FakeOpenAIHandler(_Handler):
+    """Answers POST /v1/chat/completions like the OpenAI API, streamed or not"""
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        if not self.path.endswith("/chat/completions"):
+            self._send_json({"error": {"message": "Not found"}}, 404)
+            return
+
+        settings = self.server.settings
+        self.server.count()
+        time.sleep(settings["latency"])
+        content = _reply_content(settings["reply_slides"])
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        model = request.get("model", "gpt-4o-mini")
+
+        if not request.get("stream"):
+            self._send_json(
+                {
+                    "id": completion_id,
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {"role": "assistant", "content": content},
+                            "finish_reason": "stop",
+                        }
+                    ],
+                    "usage": {
+                        "prompt_tokens": 0,
+                        "completion_tokens": 0,
+                        "total_tokens": 0,
+                    },
+                }
+            )
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        step = settings["stream_chunk_chars"]
+        for i in range(0, len(content), step):
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [
+                    {
+                        "index": 0,
+                        "delta": {"content": content[i : i + step]},
+                        "finish_reason": None,
+                    }
+                ],
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+            time.sleep(settings["stream_chunk_delay"])
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.close_connection = True
+
+
+class FakeNewsAPIHandler(_Handler):
+    """Answers GET /v2/everything and /v2/top-headlines like NewsAPI"""
+
+    def do_GET(self):
+        settings = self.server.settings
+        self.server.count()
+        time.sleep(settings["latency"])
+        self._send_json(
+            {
+                "status": "ok",
+                "totalResults": settings["articles"],
+                "articles": _articles(settings["articles"], settings["body_chars"]),
+            }
+        )
+
+
+class FakeService:
+    def __init__(self, handler, **settings):
+        """
+        Local HTTP stand-in for an external API, served from a background
+        thread on a free port. settings are read by the handler on every
+        request, so they can be changed between benchmark runs.
+        """
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.server.daemon_threads = True
+        self.server.settings = settings
+        self.server.requests = 0
+        self._lock = threading.Lock()
+        self.server.count = self._count
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def _count(self):
+        with self._lock:
+            self.server.requests += 1
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def requests(self) -> int:
+        return self.server.requests
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def start_fake_openai(
+    latency: float = 0.5,
+    reply_slides: int = 5,
+    stream_chunk_chars: int = 16,
+    stream_chunk_delay: float = 0.01,
+) -> FakeService:
+    return FakeService(
+        FakeOpenAIHandler,
+        latency=latency,
+        reply_slides=reply_slides,
+        stream_chunk_chars=stream_chunk_chars,
+        stream_chunk_delay=stream_chunk_delay,
+    ).start()
+
+
+def start_fake_newsapi(
+    latency: float = 0.1, articles: int = 5, body_chars: int = 2000
+) -> FakeService:
+    return FakeService(
+        FakeNewsAPIHandler, latency=latency, articles=articles, body_chars=body_chars
+    ).start()
@@ -0,0 +1,385 @@
+"""
+End-to-end benchmark: starts app.py against local stand-ins for OpenAI and
+NewsAPI, drives the document endpoints with generated PDFs/PPTXs and
+reports latency percentiles, throughput and peak server memory.
+
+    cd backend
+    python -m bench.run --pages 1,20,200 --requests 20 --concurrency 4
+
+Results are saved under bench/results/ and compared with the previous run.
+"""
+
+import argparse
+import glob
+import json
+import math
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+import requests
+
+from bench.documents import make_document
+from bench.fake_services import start_fake_newsapi, start_fake_openai
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(BACKEND_DIR, "bench", "results")
+ENDPOINTS = ["convert-pdf", "convert-pptx", "lesson-plan", "content-suggest"]
+
+
+def percentile(values: List[float], p: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(math.ceil(p / 100 * len(ordered)) - 1, 0)]
+
+
+def _children(pid: int) -> List[int]:
+    children = []
+    for task in glob.glob(f"/proc/{pid}/task/*/children"):
+        try:
+            with open(task) as f:
+                children += [int(child) for child in f.read().split()]
+        except OSError:
+            pass
+    return children
+
+
+def tree_rss_mb(pid: int) -> Optional[float]:
+    """RSS of a process and all its children (e.g. document workers); Linux only"""
+    total_kb = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f"/proc/{current}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total_kb += int(line.split()[1])
+        except OSError:
+            if current == pid:
+                return None
+            continue
+        pending += _children(current)
+    return total_kb / 1024
+
+
+class MemorySampler:
+    def __init__(self, pid: int, interval: float = 0.05):
+        """Tracks the peak RSS of the server process tree while running"""
+        self.pid = pid
+        self.interval = interval
+        self.peak_mb: Optional[float] = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            rss = tree_rss_mb(self.pid)
+            if rss is not None:
+                self.peak_mb = max(self.peak_mb or 0, rss)
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_app(openai_url: str, news_url: str, workdir: str, extra_env: Dict):
+    """
+    Run app.py in its own process and working directory, so its caches
+    start empty and its memory can be measured on its own.
+    """
+    port = _free_port()
+    env = {
+        **os.environ,
+        "OPENAI_API_KEY": "bench",
+        "NEWS_API_KEY": "bench",
+        "OPENAI_BASE_URL": f"{openai_url}/v1",
+        "NEWS_API_BASE_URL": f"{news_url}/v2",
+        "NEWS_PREFETCH": "0",
+        "PYTHONPATH": BACKEND_DIR,
+        **extra_env,
+    }
+    code = (
+        "import app; app.app.run(host='127.0.0.1', port=%d, threaded=True, "
+        "debug=False, use_reloader=False)" % port
+    )
+    with open(os.path.join(workdir, "server.log"), "wb") as log:
+        process = subprocess.Popen(
+            [sys.executable, "-u", "-c", code],
+            cwd=workdir,
+            env=env,
+            stdout=log,
+            stderr=subprocess.STDOUT,
+        )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"app.py exited, see {workdir}/server.log")
+        try:
+            requests.get(f"{base_url}/", timeout=1)
+            return process, base_url
+        except requests.exceptions.ConnectionError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError("app.py did not start within 60s")
+
+
+def _post_file(url: str, path: str, data: Optional[Dict] = None, timeout=600):
+    with open(path, "rb") as f:
+        response = requests.post(
+            url,
+            files={"file": (os.path.basename(path), f)},
+            data=data or {},
+            timeout=timeout,
+        )
+    response.raise_for_status()
+    return response
+
+
+def endpoint_call(base_url: str, endpoint: str, subject: str) -> Callable[[str], None]:
+    if endpoint == "convert-pdf":
+        return lambda path: _post_file(f"{base_url}/convert-pdf", path)
+    if endpoint == "convert-pptx":
+        return lambda path: _post_file(f"{base_url}/convert-pptx", path)
+    if endpoint == "lesson-plan":
+        return lambda path: _post_file(
+            f"{base_url}/lesson-plan", path, {"subject": subject}
+        )
+
+    def upload_and_suggest(path):
+        document_id = _post_file(
+            f"{base_url}/upload", path, {"subject": subject}
+        ).json()["document_id"]
+        response = requests.post(
+            f"{base_url}/content-suggest",
+            json={"document_id": document_id, "subject": subject},
+            timeout=600,
+        )
+        response.raise_for_status()
+
+    return upload_and_suggest
+
+
+def document_kind(endpoint: str) -> str:
+    return "pptx" if endpoint in ("convert-pptx", "lesson-plan") else "pdf"
+
+
+def run_case(
+    server_pid: int,
+    call: Callable[[str], None],
+    documents: List[str],
+    concurrency: int,
+) -> Dict:
+    latencies: List[float] = []
+    errors: List[str] = []
+
+    def one(path):
+        start = time.perf_counter()
+        try:
+            call(path)
+            latencies.append(time.perf_counter() - start)
+        except Exception as e:
+            errors.append(str(e))
+
+    with MemorySampler(server_pid) as memory:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(one, documents))
+        elapsed = time.perf_counter() - start
+
+    def ms(value):
+        return None if value is None else round(value * 1000, 1)
+
+    return {
+        "requests": len(documents),
+        "errors": len(errors),
+        "first_error": errors[0][:200] if errors else None,
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else None,
+        "peak_rss_mb": None if memory.peak_mb is None else round(memory.peak_mb, 1),
+    }
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BACKEND_DIR,
+            stderr=subprocess.DEVNULL,
+            text=True,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def latest_results(exclude: Optional[str] = None) -> Optional[Dict]:
+    paths = sorted(glob.glob(os.path.join(RESULTS_DIR, "*.json")))
+    paths = [path for path in paths if path != exclude]
+    if not paths:
+        return None
+    with open(paths[-1], encoding="utf-8") as f:
+        return json.load(f)
+
+
+def print_report(results: Dict, previous: Optional[Dict]):
+    repeat = results["settings"].get("repeat", False)
+    print(
+        "Documents: the same one for every request (warm caches)"
+        if repeat
+        else "Documents: a new one for every request (cold caches)"
+    )
+    # Warm and cold runs aren't comparable
+    if previous and previous.get("settings", {}).get("repeat", False) != repeat:
+        previous = None
+    previous_cases = {
+        (case["endpoint"], case["pages"]): case
+        for case in (previous or {}).get("cases", [])
+    }
+    header = (
+        f"{'endpoint':<16}{'pages':>6}{'ok/n':>9}{'p50 ms':>10}{'p95 ms':>10}"
+        f"{'p99 ms':>10}{'req/s':>8}{'rss MB':>9}{'p95 vs prev':>13}"
+    )
+    print(header)
+    print("-" * len(header))
+    for case in results["cases"]:
+        total = case["requests"]
+        ok = total - case["errors"]
+        change = ""
+        before = previous_cases.get((case["endpoint"], case["pages"]))
+        if before and before.get("p95_ms") and case["p95_ms"]:
+            change = f"{(case['p95_ms'] / before['p95_ms'] - 1) * 100:+.0f}%"
+
+        def fmt(value):
+            return "-" if value is None else value
+
+        print(
+            f"{case['endpoint']:<16}{case['pages']:>6}{f'{ok}/{total}':>9}"
+            f"{fmt(case['p50_ms']):>10}{fmt(case['p95_ms']):>10}{fmt(case['p99_ms']):>10}"
+            f"{fmt(case['throughput_rps']):>8}{fmt(case['peak_rss_mb']):>9}{change:>13}"
+        )
+        if case["first_error"]:
+            print(f"    first error: {case['first_error']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS))
+    parser.add_argument("--pages", default="1,20,200", help="document sizes")
+    parser.add_argument("--requests", type=int, default=20, help="per case")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--subject", default="biology")
+    parser.add_argument(
+        "--repeat",
+        action="store_true",
+        help="send the same document with every request, to measure warm caches",
+    )
+    parser.add_argument("--openai-latency", type=float, default=0.5)
+    parser.add_argument("--openai-reply-slides", type=int, default=5)
+    parser.add_argument("--openai-stream-delay", type=float, default=0.01)
+    parser.add_argument("--news-latency", type=float, default=0.1)
+    parser.add_argument("--news-articles", type=int, default=5)
+    parser.add_argument("--news-body-chars", type=int, default=2000)
+    parser.add_argument(
+        "--env",
+        action="append",
+        default=[],
+        metavar="NAME=VALUE",
+        help="extra environment for app.py, e.g. DOCUMENT_WORKERS=2",
+    )
+    parser.add_argument("--label", default="", help="saved with the results")
+    parser.add_argument("--no-save", action="store_true")
+    args = parser.parse_args(argv)
+
+    endpoints = [e for e in args.endpoints.split(",") if e]
+    unknown = set(endpoints) - set(ENDPOINTS)
+    if unknown:
+        parser.error(f"unknown endpoints: {', '.join(sorted(unknown))}")
+    page_counts = [int(p) for p in args.pages.split(",") if p]
+    extra_env = dict(item.split("=", 1) for item in args.env)
+
+    openai = start_fake_openai(
+        latency=args.openai_latency,
+        reply_slides=args.openai_reply_slides,
+        stream_chunk_delay=args.openai_stream_delay,
+    )
+    newsapi = start_fake_newsapi(
+        latency=args.news_latency,
+        articles=args.news_articles,
+        body_chars=args.news_body_chars,
+    )
+    workdir = tempfile.mkdtemp(prefix="upteach-bench-")
+    process, base_url = start_app(openai.url, newsapi.url, workdir, extra_env)
+    docs_dir = os.path.join(workdir, "documents")
+
+    cases = []
+    try:
+        for endpoint in endpoints:
+            call = endpoint_call(base_url, endpoint, args.subject)
+            for pages in page_counts:
+                kind = document_kind(endpoint)
+                if args.repeat:
+                    documents = [make_document(docs_dir, kind, pages)] * args.requests
+                else:
+                    documents = [
+                        make_document(docs_dir, kind, pages, uuid.uuid4().hex[:8])
+                        for _ in range(args.requests)
+                    ]
+                print(f"{endpoint}: {pages} pages x {args.requests}", flush=True)
+                case = run_case(process.pid, call, documents, args.concurrency)
+                cases.append({"endpoint": endpoint, "pages": pages, **case})
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+        openai.stop()
+        newsapi.stop()
+
+    results = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "revision": _git_revision(),
+        "label": args.label,
+        "settings": {
+            key: value for key, value in vars(args).items() if key != "no_save"
+        },
+        "upstream_calls": {"openai": openai.requests, "newsapi": newsapi.requests},
+        "cases": cases,
+    }
+    previous = latest_results()
+    print()
+    print_report(results, previous)
+    if not args.no_save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{results['revision'] or 'local'}.json"
+        path = os.path.join(RESULTS_DIR, name)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nSaved {path}")
+    print(f"Server log: {os.path.join(workdir, 'server.log')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+import zipfile
+from typing import Callable, Dict, Optional
+
+DEFAULT_MAX_AGE = 24 * 3600  # seconds since last use
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+GC_INTERVAL = 60  # seconds between garbage collections triggered by uploads
+DEFAULT_MAX_UPLOAD_BYTES = 100 * 1024 * 1024
+SNIFF_BYTES = 1024  # PDF headers may follow a little junk, see PDF 1.7 annex H
+
+_DOC_ID = re.compile(r"[0-9a-f]{64}")
+
+
+class DocumentNotFound(Exception):
+    pass
+
+
+class InvalidUpload(Exception):
+    pass
+
+
+class UploadTooLarge(InvalidUpload):
+    pass
+
+
+def sniff_type(head: bytes) -> Optional[str]:
+    """
+    "pdf" or "zip" (a PPTX candidate) from the first bytes of a file, or
+    None for anything else.
+    """
+    if b"%PDF-" in head[:SNIFF_BYTES]:
+        return "pdf"
+    if head.startswith(b"PK\x03\x04"):
+        return "zip"
+    return None
+
+
+class UploadFile:
+    def __init__(self, path: str, max_bytes: Optional[int], check_type: bool = True):
+        """
+        Temporary file an upload is written to, hashed, measured and
+        sniffed as its chunks arrive. Writing past max_bytes, or (with
+        check_type) bytes that start like neither a PDF nor a zip, fails at
+        once and removes the file. Closing it removes the file too, unless
+        the document store has taken it over.
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.check_type = check_type
+        self.digest = hashlib.sha256()
+        self.size = 0
+        self.head = b""
+        self.adopted = False
+        self._file = open(path, "w+b")
+
+    def write(self, data: bytes) -> int:
+        self.size += len(data)
+        if self.max_bytes and self.size > self.max_bytes:
+            self.close()
+            raise UploadTooLarge(
+                f"Upload is larger than the {self.max_bytes} byte limit"
+            )
+        if len(self.head) < SNIFF_BYTES:
+            self.head += data[: SNIFF_BYTES - len(self.head)]
+            if (
+                self.check_type
+                and len(self.head) >= SNIFF_BYTES
+                and sniff_type(self.head) is None
+            ):
+                self.close()
+                raise InvalidUpload("Only PDF and PPTX files are supported")
+        self.digest.update(data)
+        return self._file.write(data)
+
+    def extension(self) -> str:
+        """
+        "pdf" or "pptx" from the file's content; zips are only decks if
+        they have a presentation part. Raises InvalidUpload otherwise.
+        """
+        kind = sniff_type(self.head)
+        if kind == "zip":
+            self._file.flush()
+            try:
+                with zipfile.ZipFile(self.path) as archive:
+                    names = set(archive.namelist())
+            except zipfile.BadZipFile:
+                names = set()
+            kind = "pptx" if "ppt/presentation.xml" in names else None
+        if kind is None:
+            raise InvalidUpload("Only PDF and PPTX files are supported")
+        return kind
+
+    def close(self):
+        self._file.close()
+        if not self.adopted and os.path.exists(self.path):
+            os.remove(self.path)
+
+    def __getattr__(self, name):
+        return getattr(self._file, name)
+
+    def __iter__(self):
+        return iter(self._file)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class DocumentStore:
+    def __init__(
+        self,
+        root: str,
+        max_age: int = DEFAULT_MAX_AGE,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        max_upload_bytes: Optional[int] = DEFAULT_MAX_UPLOAD_BYTES,
+    ):
+        """
+        Content-addressed store for uploaded documents. Every upload is
+        hashed and stored once under root/<sha256>/, next to its parsed
+        artifacts (text, page count, ...). Documents unused for max_age
+        seconds, or the least recently used ones once the store grows past
+        max_bytes, are garbage collected. Single uploads are limited to
+        max_upload_bytes.
+        """
+        self.root = root
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.max_upload_bytes = max_upload_bytes
+        self._lock = threading.Lock()
+        self._last_gc = 0.0
+        os.makedirs(root, exist_ok=True)
+
+    def _dir(self, doc_id: str) -> str:
+        if not _DOC_ID.fullmatch(doc_id or ""):
+            raise DocumentNotFound("Invalid document ID")
+        return os.path.join(self.root, doc_id)
+
+    def _meta_path(self, doc_id: str) -> str:
+        return os.path.join(self._dir(doc_id), "meta.json")
+
+    def _write_json(self, path: str, data):
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    def open_upload(self, max_bytes: Optional[int] = None, check_type: bool = True):
+        """
+        New UploadFile inside the store, so taking it over is a rename.
+        max_bytes defaults to max_upload_bytes, 0 lifts the limit.
+        """
+        return UploadFile(
+            os.path.join(self.root, f"upload-{uuid.uuid4().hex}.tmp"),
+            self.max_upload_bytes if max_bytes is None else max_bytes,
+            check_type,
+        )
+
+    def put(
+        self,
+        stream,
+        filename: str,
+        chunk_size: int = 1024 * 1024,
+        validate: Optional[Callable[[str, str, str], None]] = None,
+    ) -> Dict:
+        """
+        Copy an upload stream into the store, hashing it on the way, and
+        return its metadata. An UploadFile from open_upload() has been
+        hashed already and is moved in as is. The type is taken from the
+        content, not the filename; unsupported or oversized files raise
+        InvalidUpload, and validate(path, extension, document_id) may
+        reject a new file before it is stored. Uploading the same bytes
+        again reuses the stored copy and its artifacts. Documents don't
+        record earlier versions: the same bytes may be uploaded by anyone,
+        so which version came before is up to each request.
+        """
+        upload = stream if isinstance(stream, UploadFile) else self.open_upload()
+        try:
+            if upload is not stream:
+                for chunk in iter(lambda: stream.read(chunk_size), b""):
+                    upload.write(chunk)
+            if self.max_upload_bytes and upload.size > self.max_upload_bytes:
+                raise UploadTooLarge(
+                    f"Upload is larger than the {self.max_upload_bytes} byte limit"
+                )
+            upload.flush()
+            extension = upload.extension()
+
+            doc_id = upload.digest.hexdigest()
+            doc_dir = self._dir(doc_id)
+            if validate and not os.path.exists(self._meta_path(doc_id)):
+                validate(upload.path, extension, doc_id)
+            with self._lock:
+                if os.path.exists(self._meta_path(doc_id)):
+                    meta = self.get(doc_id)
+                else:
+                    os.makedirs(doc_dir, exist_ok=True)
+                    source = f"source.{extension}"
+                    upload.adopted = True
+                    upload.close()
+                    os.replace(upload.path, os.path.join(doc_dir, source))
+                    meta = {
+                        "document_id": doc_id,
+                        "filename": filename,
+                        "extension": extension,
+                        "source": source,
+                        "size": upload.size,
+                        "created_at": time.time(),
+                    }
+                    self._write_json(self._meta_path(doc_id), meta)
+        finally:
+            upload.close()
+
+        self.touch(doc_id)
+        self._maybe_gc()
+        return meta
+
+    def get(self, doc_id: str) -> Dict:
+        try:
+            with open(self._meta_path(doc_id), encoding="utf-8") as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            raise DocumentNotFound("Document not found")
+        # Older metadata linked versions by file name across all clients
+        meta.pop("previous_id", None)
+        return meta
+
+    def path(self, doc_id: str) -> str:
+        """
+        Path of the stored upload; marks the document as recently used.
+        """
+        meta = self.get(doc_id)
+        self.touch(doc_id)
+        return os.path.join(self._dir(doc_id), meta["source"])
+
+    def touch(self, doc_id: str):
+        try:
+            os.utime(self._meta_path(doc_id))
+        except FileNotFoundError:
+            pass
+
+    def peek_artifact(self, doc_id: Optional[str], name: str):
+        """
+        A previously computed artifact, or None without computing it.
+        """
+        if not doc_id:
+            return None
+        try:
+            with open(
+                os.path.join(self._dir(doc_id), f"{name}.json"), encoding="utf-8"
+            ) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError, DocumentNotFound):
+            return None
+
+    def artifact(self, doc_id: str, name: str, compute: Callable[[], object]):
+        """
+        JSON artifact derived from a document, computed once and kept next
+        to it.
+        """
+        path = os.path.join(self._dir(doc_id), f"{name}.json")
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            pass
+        value = compute()
+        if os.path.isdir(self._dir(doc_id)):
+            self._write_json(path, value)
+        return value
+
+    def put_artifact(self, doc_id: str, name: str, value):
+        """
+        Store or replace a JSON artifact, for results that are recomputed
+        rather than derived once.
+        """
+        if os.path.isdir(self._dir(doc_id)):
+            self._write_json(os.path.join(self._dir(doc_id), f"{name}.json"), value)
+
+    def _maybe_gc(self):
+        if time.monotonic() - self._last_gc >= GC_INTERVAL:
+            self._last_gc = time.monotonic()
+            self.gc()
+
+    def gc(self) -> int:
+        """
+        Remove documents past max_age, then the least recently used ones
+        until the store fits in max_bytes. Returns the number removed.
+        """
+        entries = []
+        for doc_id in os.listdir(self.root):
+            doc_dir = os.path.join(self.root, doc_id)
+            if not _DOC_ID.fullmatch(doc_id) or not os.path.isdir(doc_dir):
+                continue
+            try:
+                last_used = os.stat(os.path.join(doc_dir, "meta.json")).st_mtime
+            except FileNotFoundError:
+                last_used = os.stat(doc_dir).st_mtime
+            size = sum(
+                os.path.getsize(os.path.join(dirpath, name))
+                for dirpath, _, names in os.walk(doc_dir)
+                for name in names
+            )
+            entries.append((last_used, doc_id, size))
+
+        removed = 0
+        now = time.time()
+        total = sum(size for _, _, size in entries)
+        with self._lock:
+            for last_used, doc_id, size in sorted(entries):
+                if now - last_used <= self.max_age and total <= self.max_bytes:
+                    break
+                shutil.rmtree(os.path.join(self.root, doc_id), ignore_errors=True)
+                total -= size
+                removed += 1
+        return removed
+
+    def get_stats(self) -> Dict:
+        doc_ids = [d for d in os.listdir(self.root) if _DOC_ID.fullmatch(d)]
+        return {
+            "documents": len(doc_ids),
+            "max_age": self.max_age,
+            "max_bytes": self.max_bytes,
+            "max_upload_bytes": self.max_upload_bytes,
+        }
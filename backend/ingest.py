@@ -0,0 +1,92 @@
+import functools
+import os
+import tarfile
+import zipfile
+from typing import IO, Callable, Dict, List, Tuple
+
+DEFAULT_CONCURRENCY = 4
+DEFAULT_MAX_FILES = 200
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024  # uncompressed bytes per batch
+
+ANALYSES = ("auto", "lesson-plan", "content-suggest")
+
+
+class IngestError(Exception):
+    pass
+
+
+def choose_analysis(analysis: str, extension: str) -> str:
+    """
+    The analysis to run on one file. "auto" treats PDFs as syllabi
+    (content-suggest) and decks as lesson plans.
+    """
+    if analysis not in ANALYSES:
+        raise IngestError(f"Unknown analysis: {analysis}")
+    if analysis != "auto":
+        return analysis
+    return "content-suggest" if extension == "pdf" else "lesson-plan"
+
+
+def _skip_member(name: str) -> bool:
+    base = os.path.basename(name)
+    # Folders zipped on macOS carry resource forks next to every file
+    return not base or base.startswith(".") or "__MACOSX/" in name
+
+
+def list_archive(stream: IO[bytes]) -> List[Tuple[str, int, Callable[[], IO[bytes]]]]:
+    """
+    (filename, uncompressed size, open) for every regular file in a zip or
+    tar archive. Nothing is extracted until open() is called, so a batch
+    can be checked against its limits before any of it is stored. Only
+    base names are returned, so member paths can't escape anywhere. Raises
+    IngestError for other formats.
+    """
+    if zipfile.is_zipfile(stream):
+        stream.seek(0)
+        archive = zipfile.ZipFile(stream)
+        return [
+            (
+                os.path.basename(info.filename),
+                info.file_size,
+                functools.partial(archive.open, info),
+            )
+            for info in archive.infolist()
+            if not info.is_dir() and not _skip_member(info.filename)
+        ]
+
+    stream.seek(0)
+    try:
+        archive = tarfile.open(fileobj=stream, mode="r:*")
+    except tarfile.TarError:
+        raise IngestError("Archives must be .zip or .tar(.gz) files")
+    return [
+        (
+            os.path.basename(member.name),
+            member.size,
+            functools.partial(archive.extractfile, member),
+        )
+        for member in archive.getmembers()
+        if member.isfile() and not _skip_member(member.name)
+    ]
+
+
+def check_limits(
+    files: int,
+    size: int,
+    max_files: int = DEFAULT_MAX_FILES,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+):
+    if files > max_files:
+        raise IngestError(f"Batch has {files} files, at most {max_files} are allowed")
+    if size > max_bytes:
+        raise IngestError(
+            f"Batch is {size} bytes uncompressed, at most {max_bytes} are allowed"
+        )
+
+
+def summarize(files: List[Dict]) -> Dict:
+    """Counts of manifest entries per status"""
+    counts: Dict[str, int] = {}
+    for entry in files:
+        counts[entry["status"]] = counts.get(entry["status"], 0) + 1
+    return counts
@@ -0,0 +1,124 @@
+"""
+Bulk course ingest: uploads a folder, an archive or a list of syllabi and
+decks to POST /ingest, follows the job's progress and writes the per-file
+result manifest.
+
+    cd backend
+    python ingest_cli.py --subject Biology materials/ extra.pptx -o manifest.json
+    python ingest_cli.py --subject Biology semester.zip
+
+The server must be running (python app.py).
+"""
+
+import argparse
+import json
+import os
+import sys
+from contextlib import ExitStack
+from typing import List
+
+import requests
+
+DOCUMENT_EXTENSIONS = (".pdf", ".pptx")
+ARCHIVE_EXTENSIONS = (".zip", ".tar", ".tar.gz", ".tgz")
+
+
+def collect(paths: List[str]):
+    """Split paths into documents and archives, walking directories"""
+    documents, archives = [], []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                documents += [
+                    os.path.join(root, name)
+                    for name in sorted(names)
+                    if name.lower().endswith(DOCUMENT_EXTENSIONS)
+                ]
+        elif path.lower().endswith(ARCHIVE_EXTENSIONS):
+            archives.append(path)
+        else:
+            documents.append(path)
+    return documents, archives
+
+
+def submit(server, subject, documents, archives, analysis, mode):
+    with ExitStack() as stack:
+        files = [
+            ("files", (os.path.basename(path), stack.enter_context(open(path, "rb"))))
+            for path in documents
+        ] + [
+            ("archive", (os.path.basename(path), stack.enter_context(open(path, "rb"))))
+            for path in archives
+        ]
+        response = requests.post(
+            f"{server}/ingest",
+            data={"subject": subject, "analysis": analysis, "mode": mode},
+            files=files,
+            timeout=600,
+        )
+    data = response.json()
+    if response.status_code != 202:
+        raise SystemExit(f"Ingest failed ({response.status_code}): {data.get('error')}")
+    return data
+
+
+def follow(server, job_id):
+    """Print progress from the job's event stream until the job finishes"""
+    with requests.get(f"{server}/jobs/{job_id}/events", stream=True) as response:
+        for line in response.iter_lines(decode_unicode=True):
+            if not line or not line.startswith("data: "):
+                continue
+            job = json.loads(line[len("data: ") :])
+            progress = job["progress"]
+            print(
+                f"\r{job['status']:<10} "
+                f"{progress.get('files_done', 0)} done, "
+                f"{progress.get('files_failed', 0)} failed, "
+                f"{progress.get('files_skipped', 0)} skipped "
+                f"of {progress.get('files_total', '?')}",
+                end="",
+                file=sys.stderr,
+            )
+            if job["status"] in ("succeeded", "failed", "cancelled"):
+                print(file=sys.stderr)
+                return job
+    return requests.get(f"{server}/jobs/{job_id}").json()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("paths", nargs="+", help="files, folders or archives")
+    parser.add_argument("--subject", required=True)
+    parser.add_argument("--server", default="http://127.0.0.1:5000")
+    parser.add_argument(
+        "--analysis",
+        default="auto",
+        choices=["auto", "lesson-plan", "content-suggest"],
+        help="auto: content-suggest for PDFs, lesson-plan for decks",
+    )
+    parser.add_argument("--mode", default="", help="lesson-plan mode, e.g. per-slide")
+    parser.add_argument("-o", "--output", help="manifest file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    documents, archives = collect(args.paths)
+    if not documents and not archives:
+        parser.error("no PDF, PPTX or archive files found")
+    server = args.server.rstrip("/")
+
+    job = submit(server, args.subject, documents, archives, args.analysis, args.mode)
+    print(f"Job {job['job_id']} queued", file=sys.stderr)
+    job = follow(server, job["job_id"])
+    if job["status"] != "succeeded":
+        raise SystemExit(f"Job {job['status']}: {job.get('error', '')}")
+
+    manifest = json.dumps(job["result"], indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(manifest)
+        print(f"Manifest written to {args.output}", file=sys.stderr)
+    else:
+        print(manifest)
+
+
+if __name__ == "__main__":
+    main()
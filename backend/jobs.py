@@ -0,0 +1,234 @@
+import queue
+import threading
+import time
+import traceback
+import uuid
+from typing import Callable, Dict, Optional
+
+DEFAULT_WORKERS = 2
+DEFAULT_QUEUE_SIZE = 20
+DEFAULT_RESULT_TTL = 3600  # seconds finished jobs are kept around
+
+TERMINAL_STATUSES = ("succeeded", "failed", "cancelled")
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class QueueFull(Exception):
+    pass
+
+
+class Job:
+    def __init__(
+        self,
+        kind: str,
+        fn: Callable[["Job"], Dict],
+        cleanup: Optional[Callable[[], None]] = None,
+    ):
+        """
+        A unit of background work. fn receives the job itself so it can
+        report progress with update()/increment() and stop early with
+        raise_if_cancelled(). cleanup releases whatever the job was given
+        (e.g. temporary files) once it is over, even if fn never ran.
+        """
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.fn = fn
+        self.cleanup = cleanup
+        self.status = "queued"
+        self.progress: Dict[str, int] = {}
+        self.result: Optional[Dict] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.version = 0
+        self._cancel = threading.Event()
+        self._changed = threading.Condition()
+
+    def _touch(self):
+        # Caller holds self._changed
+        self.version += 1
+        self._changed.notify_all()
+
+    def update(self, **progress):
+        with self._changed:
+            self.progress.update(progress)
+            self._touch()
+
+    def increment(self, name: str, amount: int = 1):
+        with self._changed:
+            self.progress[name] = self.progress.get(name, 0) + amount
+            self._touch()
+
+    def set_status(self, status: str, result=None, error=None):
+        with self._changed:
+            self.status = status
+            self.result = result
+            self.error = error
+            if status in TERMINAL_STATUSES:
+                self.finished_at = time.time()
+            self._touch()
+
+    def cancel(self):
+        self._cancel.set()
+        with self._changed:
+            if self.status == "queued":
+                self.status = "cancelled"
+                self.finished_at = time.time()
+            self._touch()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def raise_if_cancelled(self):
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    @property
+    def done(self) -> bool:
+        return self.status in TERMINAL_STATUSES
+
+    def wait_for_change(self, version: int, timeout: float) -> int:
+        """
+        Block until the job changes past version (or timeout), return the new version.
+        """
+        with self._changed:
+            self._changed.wait_for(lambda: self.version != version, timeout)
+            return self.version
+
+    def to_dict(self) -> Dict:
+        with self._changed:
+            data = {
+                "job_id": self.id,
+                "kind": self.kind,
+                "status": self.status,
+                "progress": dict(self.progress),
+                "created_at": self.created_at,
+                "finished_at": self.finished_at,
+            }
+            if self.result is not None:
+                data["result"] = self.result
+            if self.error is not None:
+                data["error"] = self.error
+            return data
+
+
+class JobShare:
+    def __init__(self, job: Job):
+        """
+        One part of a job that runs alongside its other parts, e.g. one file
+        of a batch. Progress the part reports is added to the job's totals
+        instead of replacing the other parts', and it is cancelled with the job.
+        """
+        self.job = job
+
+    def update(self, **progress):
+        for name, amount in progress.items():
+            self.job.increment(name, amount)
+
+    def increment(self, name: str, amount: int = 1):
+        self.job.increment(name, amount)
+
+    @property
+    def cancelled(self) -> bool:
+        return self.job.cancelled
+
+    def raise_if_cancelled(self):
+        self.job.raise_if_cancelled()
+
+
+class JobManager:
+    def __init__(
+        self,
+        workers: int = DEFAULT_WORKERS,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        result_ttl: int = DEFAULT_RESULT_TTL,
+    ):
+        """
+        Runs jobs on a fixed pool of worker threads fed by a bounded queue.
+        submit() fails fast with QueueFull instead of piling up work.
+        """
+        self.result_ttl = result_ttl
+        self._queue: "queue.Queue[Job]" = queue.Queue(maxsize=queue_size)
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._workers = [
+            threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(
+        self,
+        kind: str,
+        fn: Callable[[Job], Dict],
+        cleanup: Optional[Callable[[], None]] = None,
+    ) -> Job:
+        """
+        Queue fn as a job. cleanup runs exactly once when the job is over,
+        however it ends: finished, failed, cancelled before it started, or
+        rejected here because the queue is full.
+        """
+        self._purge()
+        job = Job(kind, fn, cleanup)
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            self._cleanup(job)
+            raise QueueFull("Job queue is full, try again later")
+        with self._lock:
+            self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _purge(self):
+        cutoff = time.time() - self.result_ttl
+        with self._lock:
+            for job_id in [
+                job_id
+                for job_id, job in self._jobs.items()
+                if job.finished_at is not None and job.finished_at < cutoff
+            ]:
+                del self._jobs[job_id]
+
+    @staticmethod
+    def _cleanup(job: Job):
+        if job.cleanup is None:
+            return
+        try:
+            job.cleanup()
+        except Exception as e:
+            print(f"Error cleaning up job {job.id}: {str(e)}")
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            try:
+                if job.cancelled:
+                    continue
+                job.set_status("running")
+                result = job.fn(job)
+                job.set_status("succeeded", result=result)
+            except JobCancelled:
+                job.set_status("cancelled")
+            except Exception as e:
+                print(f"Error in job {job.id}: {str(e)}")
+                traceback.print_exc()
+                job.set_status("failed", error=str(e))
+            finally:
+                self._cleanup(job)
+                self._queue.task_done()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            statuses: Dict[str, int] = {}
+            for job in self._jobs.values():
+                statuses[job.status] = statuses.get(job.status, 0) + 1
+        return {"queued": self._queue.qsize(), "jobs": statuses}
@@ -0,0 +1,117 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+DEFAULT_TTL = 24 * 3600  # seconds
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+
+
+def completion_key(
+    model: str, prompt: str, image_data: Optional[bytes] = None, max_tokens: int = 0
+) -> str:
+    """
+    Hash of everything that determines a completion: model, final prompt
+    (document text plus news payload), image bytes and token limit.
+    """
+    digest = hashlib.sha256()
+    for part in (model, str(max_tokens), prompt):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    digest.update(image_data or b"")
+    return digest.hexdigest()
+
+
+class CompletionCache:
+    def __init__(
+        self, db_path: str, ttl: int = DEFAULT_TTL, max_bytes: int = DEFAULT_MAX_BYTES
+    ):
+        """
+        Persistent SQLite cache of model completions. Entries expire after
+        ttl seconds and the least recently used ones are dropped once the
+        stored responses go over max_bytes.
+        """
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS completions (
+                key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+            """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_completions_last_used "
+            "ON completions (last_used)"
+        )
+        self._conn.commit()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, expires_at FROM completions WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row[1] <= now:
+                if row is not None:
+                    self._conn.execute("DELETE FROM completions WHERE key = ?", (key,))
+                    self._conn.commit()
+                self.stats["misses"] += 1
+                return None
+            self._conn.execute(
+                "UPDATE completions SET last_used = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            self.stats["hits"] += 1
+            return row[0]
+
+    def put(self, key: str, response: str):
+        now = time.time()
+        size = len(response.encode("utf-8"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO completions "
+                "(key, response, size, expires_at, last_used) VALUES (?, ?, ?, ?, ?)",
+                (key, response, size, now + self.ttl, now),
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now: float):
+        cursor = self._conn.execute(
+            "DELETE FROM completions WHERE expires_at <= ?", (now,)
+        )
+        self.stats["evictions"] += cursor.rowcount
+        total = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM completions"
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute(
+            "SELECT key, size FROM completions ORDER BY last_used"
+        ).fetchall()
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM completions WHERE key = ?", (key,))
+            self.stats["evictions"] += 1
+            total -= size
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            entries, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM completions"
+            ).fetchone()
+            return {
+                **self.stats,
+                "entries": entries,
+                "bytes": total,
+                "max_bytes": self.max_bytes,
+            }
@@ -0,0 +1,179 @@
+import json
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+DEFAULT_MAX_CONCURRENCY = 4
+DEFAULT_REQUESTS_PER_MINUTE = 60
+DEFAULT_CHUNK_SLIDES = 4
+
+
+class RateLimiter:
+    def __init__(self, requests_per_minute: int = DEFAULT_REQUESTS_PER_MINUTE):
+        """
+        Token bucket shared by every caller in the process. acquire() blocks
+        until a request may be sent. requests_per_minute=0 lifts the limit.
+        """
+        self.rate = max(requests_per_minute, 0) / 60.0
+        self.capacity = max(1, requests_per_minute // 6)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if not self.rate:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+
+
+class LLMLimiter:
+    def __init__(
+        self,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        requests_per_minute: int = DEFAULT_REQUESTS_PER_MINUTE,
+    ):
+        """
+        Process-wide bound on in-flight model calls plus a request rate limit,
+        so every model call, whichever request or job sends it, shares one
+        budget. Not re-entrant: a call holding a slot must not ask for another.
+        """
+        self.max_concurrency = max_concurrency
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self._rate_limiter = RateLimiter(requests_per_minute)
+
+    @contextmanager
+    def slot(self):
+        """Hold one in-flight slot, e.g. for as long as a reply streams"""
+        with self._semaphore:
+            self._rate_limiter.acquire()
+            yield
+
+    def call(self, fn: Callable, *args, **kwargs):
+        with self.slot():
+            return fn(*args, **kwargs)
+
+
+def chunk_pages(pages: List[str], chunk_size: int) -> List[Tuple[int, List[str]]]:
+    """
+    Split per-page text into (first_page_index, pages) chunks.
+    """
+    chunk_size = max(1, chunk_size)
+    return [
+        (start, pages[start : start + chunk_size])
+        for start in range(0, len(pages), chunk_size)
+    ]
+
+
+def chunk_page_runs(
+    pages: List[str], indexes: List[int], chunk_size: int
+) -> List[Tuple[int, List[str]]]:
+    """
+    Like chunk_pages, but only for the pages at indexes (sorted), e.g. the
+    slides that changed. Runs of consecutive pages share chunks.
+    """
+    chunk_size = max(1, chunk_size)
+    chunks = []
+    for index in indexes:
+        if chunks:
+            start, chunk = chunks[-1]
+            if start + len(chunk) == index and len(chunk) < chunk_size:
+                chunk.append(pages[index])
+                continue
+        chunks.append((index, [pages[index]]))
+    return chunks
+
+
+def format_chunk(first_index: int, pages: List[str]) -> str:
+    return "\n\n".join(
+        f"Slide {first_index + offset + 1}:\n{text}"
+        for offset, text in enumerate(pages)
+    )
+
+
+def parse_slide_suggestions(content: str, default_slide: int) -> List[Dict]:
+    """
+    Parse a model reply into a list of {"slide", "suggestions"} objects,
+    tolerating markdown code fences. Unparseable replies are kept as a
+    single suggestion on default_slide instead of being dropped.
+    """
+    text = re.sub(r"^```(?:json)?\s*|\s*```$", "", content.strip())
+    try:
+        parsed = json.loads(text)
+    except json.JSONDecodeError:
+        return [
+            {"slide": default_slide, "suggestions": [{"content": content, "link": ""}]}
+        ]
+
+    if isinstance(parsed, dict):
+        parsed = [parsed]
+    results = []
+    for item in parsed if isinstance(parsed, list) else []:
+        suggestion = normalize_slide_suggestion(item, default_slide)
+        if suggestion is not None:
+            results.append(suggestion)
+    return results
+
+
+def normalize_slide_suggestion(item, default_slide: int) -> Optional[Dict]:
+    """
+    A {"slide", "suggestions"} object with an integer slide number, or None
+    if item doesn't look like one.
+    """
+    if not isinstance(item, dict) or not isinstance(item.get("suggestions"), list):
+        return None
+    try:
+        slide = int(item.get("slide", default_slide))
+    except (TypeError, ValueError):
+        slide = default_slide
+    return {"slide": slide, "suggestions": item["suggestions"]}
+
+
+def merge_slide_suggestions(results: List[List[Dict]]) -> List[Dict]:
+    """
+    Merge per-chunk results into one list ordered by slide number, combining
+    entries that refer to the same slide.
+    """
+    merged: Dict[int, List[Dict]] = {}
+    for chunk_result in results:
+        for item in chunk_result:
+            merged.setdefault(item["slide"], []).extend(item["suggestions"])
+    return [
+        {"slide": slide, "suggestions": suggestions}
+        for slide, suggestions in sorted(merged.items())
+    ]
+
+
+def fan_out(
+    chunks: List[Tuple[int, List[str]]],
+    analyze_chunk: Callable[[int, List[str]], List[Dict]],
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+) -> List[Dict]:
+    """
+    Run analyze_chunk(first_index, pages) for every chunk in parallel, at
+    most max_concurrency at a time, and return the merged, slide-ordered
+    suggestions. analyze_chunk sends its model call through the limiter.
+    """
+    if not chunks:
+        return []
+
+    def run(chunk):
+        return analyze_chunk(*chunk)
+
+    workers = min(len(chunks), max_concurrency)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="llm") as pool:
+        results = list(pool.map(run, chunks))
+    return merge_slide_suggestions(results)
@@ -0,0 +1,90 @@
+import json
+from typing import Dict, List
+
+from llm_fanout import normalize_slide_suggestion
+
+
+class JSONObjectStream:
+    def __init__(self):
+        """
+        Pulls complete JSON objects out of text that arrives in pieces, such
+        as a streamed model reply. Every object that opens outside another
+        object is returned by feed() as soon as its closing brace arrives,
+        whether the reply is a JSON array, bare objects or fenced markdown.
+        """
+        self._buffer: List[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, text: str) -> List:
+        objects = []
+        for char in text:
+            if self._depth == 0:
+                if char == "{":
+                    self._depth = 1
+                    self._buffer = [char]
+                continue
+
+            self._buffer.append(char)
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    try:
+                        objects.append(json.loads("".join(self._buffer)))
+                    except json.JSONDecodeError:
+                        pass
+                    self._buffer = []
+        return objects
+
+
+class SlideSuggestionStream:
+    def __init__(self, default_slide: int = 1):
+        """
+        Incremental counterpart of parse_slide_suggestions: feed() returns
+        each {"slide", "suggestions"} object as soon as the model closes it.
+        """
+        self.default_slide = default_slide
+        self._objects = JSONObjectStream()
+        self._text: List[str] = []
+        self.suggestions: List[Dict] = []
+
+    def feed(self, text: str) -> List[Dict]:
+        self._text.append(text)
+        completed = []
+        for item in self._objects.feed(text):
+            suggestion = normalize_slide_suggestion(item, self.default_slide)
+            if suggestion is not None:
+                completed.append(suggestion)
+        self.suggestions.extend(completed)
+        return completed
+
+    def close(self) -> List[Dict]:
+        """
+        Called once the reply is complete. A reply without any slide objects
+        is kept as a single suggestion, like the non-streaming fallback.
+        """
+        if self.suggestions:
+            return []
+        content = "".join(self._text)
+        fallback = {
+            "slide": self.default_slide,
+            "suggestions": [{"content": content, "link": ""}],
+        }
+        self.suggestions.append(fallback)
+        return [fallback]
+
+
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
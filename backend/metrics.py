@@ -0,0 +1,195 @@
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Seconds; covers cached lookups (ms) up to long model calls and large renders
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# Spans of the request being profiled, or None when profiling is off
+_profile: contextvars.ContextVar[Optional[List[Dict]]] = contextvars.ContextVar(
+    "profile", default=None
+)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+
+class Metrics:
+    def __init__(self, prefix: str = "upteach"):
+        """
+        Process-wide histograms and counters, rendered in the Prometheus
+        text format by render().
+        """
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._help: Dict[str, str] = {}
+
+    def observe(self, name: str, value: float, help: str = "", **labels):
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        with self._lock:
+            self._help.setdefault(name, help)
+            series = self._histograms.setdefault(name, {})
+            series.setdefault(key, Histogram()).observe(value)
+
+    def inc(self, name: str, value: float = 1, help: str = "", **labels):
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        with self._lock:
+            self._help.setdefault(name, help)
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    @staticmethod
+    def _labels(key: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+        pairs = key + extra
+        if not pairs:
+            return ""
+        escaped = (
+            (k, v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+            for k, v in pairs
+        )
+        return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+    def render(self, gauges: Optional[Dict[str, Dict]] = None) -> str:
+        """
+        All metrics in the Prometheus text exposition format. gauges maps a
+        component name to a stats dict; its numeric values are exported as
+        <prefix>_<component>_<key>.
+        """
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._histograms.items()):
+                full = f"{self.prefix}_{name}"
+                lines.append(f"# HELP {full} {self._help.get(name, '')}")
+                lines.append(f"# TYPE {full} histogram")
+                for key, hist in sorted(series.items()):
+                    for bound, count in zip(hist.buckets, hist.counts):
+                        labels = self._labels(key, (("le", repr(float(bound))),))
+                        lines.append(f"{full}_bucket{labels} {count}")
+                    labels = self._labels(key, (("le", "+Inf"),))
+                    lines.append(f"{full}_bucket{labels} {hist.count}")
+                    lines.append(f"{full}_sum{self._labels(key)} {hist.sum}")
+                    lines.append(f"{full}_count{self._labels(key)} {hist.count}")
+            for name, series in sorted(self._counters.items()):
+                full = f"{self.prefix}_{name}"
+                lines.append(f"# HELP {full} {self._help.get(name, '')}")
+                lines.append(f"# TYPE {full} counter")
+                for key, value in sorted(series.items()):
+                    lines.append(f"{full}{self._labels(key)} {value}")
+
+        for component, stats in sorted((gauges or {}).items()):
+            for stat, value in sorted(stats.items()):
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                full = f"{self.prefix}_{component}_{stat}"
+                lines.append(f"# TYPE {full} gauge")
+                lines.append(f"{full} {value}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+def record_span(stage: str, seconds: float, **sizes):
+    """
+    Record a finished stage: its duration histogram, a counter per size
+    (pages, bytes, tokens, ...) and, when the request is being profiled,
+    an entry in its timing breakdown.
+    """
+    metrics.observe(
+        "stage_duration_seconds",
+        seconds,
+        help="Time spent in each processing stage",
+        stage=stage,
+    )
+    for unit, amount in sizes.items():
+        if isinstance(amount, (int, float)) and not isinstance(amount, bool):
+            metrics.inc(
+                "stage_size_total",
+                amount,
+                help="Pages, bytes and tokens handled by each stage",
+                stage=stage,
+                unit=unit,
+            )
+    profile = _profile.get()
+    if profile is not None:
+        profile.append({"stage": stage, "ms": round(seconds * 1000, 2), **sizes})
+
+
+@contextmanager
+def span(stage: str, **sizes):
+    """
+    Time a block as stage. Sizes known only at the end can be added to the
+    yielded dict.
+    """
+    start = time.perf_counter()
+    try:
+        yield sizes
+    finally:
+        record_span(stage, time.perf_counter() - start, **sizes)
+
+
+def timed_pages(stage: str, pages: Iterable[Tuple[int, bytes]]) -> Iterator:
+    """
+    Pass through a lazy (index, image_bytes) iterator, recording one span
+    for the time spent producing its pages, with page and byte counts.
+    """
+    seconds = 0.0
+    count = 0
+    size = 0
+    iterator = iter(pages)
+    try:
+        while True:
+            start = time.perf_counter()
+            try:
+                page = next(iterator)
+            except StopIteration:
+                seconds += time.perf_counter() - start
+                return
+            seconds += time.perf_counter() - start
+            count += 1
+            size += len(page[1])
+            yield page
+    finally:
+        if count or seconds:
+            record_span(stage, seconds, pages=count, bytes=size)
+
+
+def start_profile() -> List[Dict]:
+    spans: List[Dict] = []
+    _profile.set(spans)
+    return spans
+
+
+def stop_profile():
+    _profile.set(None)
+
+
+def bind_context(fn: Callable) -> Callable:
+    """
+    Wrap fn so it runs with the caller's context variables, e.g. inside a
+    thread pool, and its spans still reach the profiled request.
+    """
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        return context.copy().run(fn, *args, **kwargs)
+
+    return run
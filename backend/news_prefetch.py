@@ -0,0 +1,190 @@
+import re
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from GetNews import GetNewsContent
+
+DEFAULT_INTERVAL = 900  # seconds between refreshes
+DEFAULT_TOP_SUBJECTS = 30
+DEFAULT_CANDIDATES = 30  # articles fetched per subject, ranked locally afterwards
+
+
+def load_categories(path: str) -> List[str]:
+    """
+    Read the NewsAPI category names out of categories.txt, skipping the
+    explanatory text around them.
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            return [line.strip() for line in f if re.fullmatch(r"[a-z]+", line.strip())]
+    except FileNotFoundError:
+        return []
+
+
+def _normalize(subject: str) -> str:
+    return " ".join(subject.lower().split())
+
+
+class NewsPrefetcher:
+    def __init__(
+        self,
+        news: GetNewsContent,
+        categories: Optional[List[str]] = None,
+        interval: int = DEFAULT_INTERVAL,
+        top_subjects: int = DEFAULT_TOP_SUBJECTS,
+        days_back: int = 7,
+        background: bool = True,
+        max_articles: int = DEFAULT_CANDIDATES,
+    ):
+        """
+        Keep news for the most requested subjects and categories warm in
+        the background, so request handlers only hit NewsAPI on a miss.
+        Only what has been looked up is refreshed: popularity is tracked
+        from the lookups themselves and decays every refresh so it follows
+        recent traffic. categories are kept warm even before anyone asks
+        for them.
+        """
+        self.news = news
+        self.categories = categories or []
+        self.interval = interval
+        self.top_subjects = top_subjects
+        self.days_back = days_back
+        self.background = background
+        self.max_articles = max_articles
+        self._requests: Counter = Counter()
+        self._category_requests: Counter = Counter()
+        self._subjects: Dict[Tuple[str, int], Tuple[float, Dict]] = {}
+        self._events: Dict[Optional[str], Tuple[float, Dict]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {"warm_hits": 0, "misses": 0, "refreshes": 0}
+
+    def _is_fresh(self, fetched_at: float) -> bool:
+        # Entries survive one missed refresh before they are considered stale
+        return time.monotonic() - fetched_at < 2 * self.interval
+
+    def get_subject_news(self, subject: str, days_back: int = 7) -> Dict:
+        self._ensure_started()
+        subject = _normalize(subject)
+        key = (subject, days_back)
+        with self._lock:
+            self._requests[subject] += 1
+            entry = self._subjects.get(key)
+            if entry and self._is_fresh(entry[0]):
+                self.stats["warm_hits"] += 1
+                return entry[1]
+            self.stats["misses"] += 1
+
+        result = self.news.get_subject_news(
+            subject, days_back=days_back, max_articles=self.max_articles
+        )
+        if result:
+            with self._lock:
+                self._subjects[key] = (time.monotonic(), result)
+        return result
+
+    def get_current_events(self, category: Optional[str] = None) -> Dict:
+        self._ensure_started()
+        with self._lock:
+            self._category_requests[category] += 1
+            entry = self._events.get(category)
+            if entry and self._is_fresh(entry[0]):
+                self.stats["warm_hits"] += 1
+                return entry[1]
+            self.stats["misses"] += 1
+
+        result = self.news.get_current_events(category=category)
+        if result:
+            with self._lock:
+                self._events[category] = (time.monotonic(), result)
+        return result
+
+    def refresh(self):
+        """
+        Re-fetch the top subjects and the requested categories, bypassing
+        the client cache.
+        """
+        with self._lock:
+            subjects = [s for s, _ in self._requests.most_common(self.top_subjects)]
+            categories = list(self.categories) + [
+                c for c in self._category_requests if c not in self.categories
+            ]
+            # Halve the counts so subjects nobody asks for anymore drop out
+            for requests in (self._requests, self._category_requests):
+                for key in list(requests):
+                    requests[key] //= 2
+                requests += Counter()
+
+        for subject in subjects:
+            if self._stop.is_set():
+                return
+            result = self.news.get_subject_news(
+                subject,
+                days_back=self.days_back,
+                max_articles=self.max_articles,
+                refresh=True,
+            )
+            if result:
+                with self._lock:
+                    self._subjects[(subject, self.days_back)] = (
+                        time.monotonic(),
+                        result,
+                    )
+
+        for category in categories:
+            if self._stop.is_set():
+                return
+            result = self.news.get_current_events(category=category, refresh=True)
+            if result:
+                with self._lock:
+                    self._events[category] = (time.monotonic(), result)
+
+        with self._lock:
+            self.stats["refreshes"] += 1
+            now = time.monotonic()
+            for store in (self._subjects, self._events):
+                for key in [
+                    k for k, (t, _) in store.items() if now - t > 4 * self.interval
+                ]:
+                    del store[key]
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Error prefetching news: {e}")
+            self._stop.wait(self.interval)
+
+    def _ensure_started(self):
+        # Started on first use so only processes that actually serve requests
+        # (not e.g. the debug reloader parent) run the refresh thread
+        if self.background and self._thread is None:
+            self.start()
+
+    def start(self):
+        """
+        Start the refresh thread; safe to call more than once.
+        """
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(
+                target=self._run, name="news-prefetch", daemon=True
+            )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                **self.stats,
+                "tracked_subjects": len(self._requests),
+                "warm_subjects": len(self._subjects),
+                "warm_categories": len(self._events),
+            }
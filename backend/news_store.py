@@ -0,0 +1,285 @@
+import re
+import sqlite3
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_MAX_AGE_DAYS = 31  # NewsAPI's free plan doesn't search further back anyway
+
+_TOKEN = re.compile(r"\w+")
+
+
+def _day(value: date) -> str:
+    return value.strftime("%Y-%m-%d")
+
+
+def _today() -> date:
+    # NewsAPI's from/to days are UTC days
+    return datetime.now(timezone.utc).date()
+
+
+def _end_of_day(day: str) -> float:
+    """Timestamp of the UTC midnight that ends day"""
+    start = datetime.strptime(day, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    return (start + timedelta(days=1)).timestamp()
+
+
+def match_query(subject: str, any_of: Tuple[str, ...] = ()) -> str:
+    """
+    FTS5 query for every word of subject and at least one of any_of, the
+    local equivalent of NewsAPI's "subject AND (a OR b)". Words are quoted,
+    so FTS5 operators in the subject are taken literally.
+    """
+    words = [f'"{word}"' for word in _TOKEN.findall(subject.lower())]
+    query = " AND ".join(words)
+    if any_of:
+        alternatives = " OR ".join(f'"{word}"' for word in any_of)
+        query = f"{query} AND ({alternatives})" if query else alternatives
+    return query
+
+
+class ArticleStore:
+    def __init__(self, db_path: str, max_age_days: int = DEFAULT_MAX_AGE_DAYS):
+        """
+        Persistent SQLite store of every news article fetched, deduplicated
+        by URL and full-text indexed with FTS5. It also records which days
+        each NewsAPI query has already covered, so a query only needs
+        NewsAPI for the days that are missing. Articles published more than
+        max_age_days ago are dropped.
+        """
+        self.max_age_days = max_age_days
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS articles (
+                id INTEGER PRIMARY KEY,
+                url TEXT NOT NULL UNIQUE,
+                title TEXT NOT NULL,
+                description TEXT NOT NULL,
+                content TEXT NOT NULL,
+                source TEXT NOT NULL,
+                author TEXT,
+                url_to_image TEXT,
+                published_at TEXT NOT NULL,
+                published_day TEXT NOT NULL,
+                category TEXT,
+                fetched_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_articles_published_day
+                ON articles (published_day);
+            CREATE INDEX IF NOT EXISTS idx_articles_category
+                ON articles (category, published_day);
+
+            CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+                title, description, content, content='articles', content_rowid='id'
+            );
+            CREATE TRIGGER IF NOT EXISTS articles_ai AFTER INSERT ON articles BEGIN
+                INSERT INTO articles_fts (rowid, title, description, content)
+                VALUES (new.id, new.title, new.description, new.content);
+            END;
+            CREATE TRIGGER IF NOT EXISTS articles_ad AFTER DELETE ON articles BEGIN
+                INSERT INTO articles_fts (articles_fts, rowid, title, description, content)
+                VALUES ('delete', old.id, old.title, old.description, old.content);
+            END;
+            CREATE TRIGGER IF NOT EXISTS articles_au AFTER UPDATE ON articles BEGIN
+                INSERT INTO articles_fts (articles_fts, rowid, title, description, content)
+                VALUES ('delete', old.id, old.title, old.description, old.content);
+                INSERT INTO articles_fts (rowid, title, description, content)
+                VALUES (new.id, new.title, new.description, new.content);
+            END;
+
+            -- Which articles a query returned, in NewsAPI's order
+            CREATE TABLE IF NOT EXISTS query_articles (
+                query_key TEXT NOT NULL,
+                article_id INTEGER NOT NULL REFERENCES articles (id) ON DELETE CASCADE,
+                position INTEGER NOT NULL,
+                PRIMARY KEY (query_key, article_id)
+            );
+            -- Days a query has been fetched for, and when
+            CREATE TABLE IF NOT EXISTS coverage (
+                query_key TEXT NOT NULL,
+                day TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                PRIMARY KEY (query_key, day)
+            );
+            """)
+        self._conn.commit()
+        self.stats = {"local_hits": 0, "fetches": 0, "articles_added": 0}
+
+    def missing_days(
+        self,
+        query_key: str,
+        start: date,
+        end: date,
+        fresh_for: float,
+        match: str = "",
+        enough: int = 0,
+    ) -> List[date]:
+        """
+        Days in [start, end] the query hasn't covered yet. A day fetched
+        after it ended (UTC) stays covered; one fetched while it was still
+        going on is refetched after fresh_for seconds, because new articles
+        kept appearing after the fetch. If the store already has
+        enough articles matching match on the missing days, e.g. fetched
+        for an overlapping subject, nothing is missing.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT day, fetched_at FROM coverage "
+                "WHERE query_key = ? AND day BETWEEN ? AND ?",
+                (query_key, _day(start), _day(end)),
+            ).fetchall()
+        now = time.time()
+        covered = {
+            row["day"]
+            for row in rows
+            if row["fetched_at"] >= _end_of_day(row["day"])
+            or now - row["fetched_at"] < fresh_for
+        }
+        days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+        missing = [day for day in days if _day(day) not in covered]
+        if missing and match and enough:
+            if len(self.search(match, missing[0], missing[-1], enough)) >= enough:
+                missing = []
+        if not missing:
+            with self._lock:
+                self.stats["local_hits"] += 1
+        return missing
+
+    def add(
+        self,
+        articles: List[Dict],
+        query_key: Optional[str] = None,
+        category: Optional[str] = None,
+        covered_days: Tuple[date, ...] = (),
+        replace: bool = False,
+    ):
+        """
+        Store NewsAPI articles (new URLs are inserted, known ones refreshed),
+        link them to query_key in order and mark covered_days as fetched.
+        replace=True drops the query's earlier links first, for lists such
+        as top headlines that are replaced rather than extended.
+        """
+        now = time.time()
+        with self._lock:
+            if query_key is not None and replace:
+                self._conn.execute(
+                    "DELETE FROM query_articles WHERE query_key = ?", (query_key,)
+                )
+            for position, article in enumerate(articles):
+                url = article.get("url")
+                published_at = article.get("publishedAt") or ""
+                if not url or not article.get("title"):
+                    continue
+                row = self._conn.execute(
+                    "SELECT id FROM articles WHERE url = ?", (url,)
+                ).fetchone()
+                values = (
+                    article["title"],
+                    article.get("description") or "",
+                    article.get("content") or "",
+                    (article.get("source") or {}).get("name") or "",
+                    article.get("author"),
+                    article.get("urlToImage"),
+                    published_at,
+                    published_at[:10] or _day(_today()),
+                    now,
+                )
+                if row is None:
+                    article_id = self._conn.execute(
+                        "INSERT INTO articles (title, description, content, source, "
+                        "author, url_to_image, published_at, published_day, "
+                        "fetched_at, url, category) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        values + (url, category),
+                    ).lastrowid
+                    self.stats["articles_added"] += 1
+                else:
+                    article_id = row["id"]
+                    self._conn.execute(
+                        "UPDATE articles SET title = ?, description = ?, "
+                        "content = ?, source = ?, author = ?, url_to_image = ?, "
+                        "published_at = ?, published_day = ?, fetched_at = ?, "
+                        "category = COALESCE(?, category) WHERE id = ?",
+                        values + (category, article_id),
+                    )
+                if query_key is not None:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO query_articles "
+                        "(query_key, article_id, position) VALUES (?, ?, ?)",
+                        (query_key, article_id, position),
+                    )
+            if query_key is not None:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO coverage (query_key, day, fetched_at) "
+                    "VALUES (?, ?, ?)",
+                    [(query_key, _day(day), now) for day in covered_days],
+                )
+            self.stats["fetches"] += 1
+            self._evict()
+            self._conn.commit()
+
+    def search(
+        self,
+        match: str,
+        start: date,
+        end: date,
+        limit: int,
+        query_key: Optional[str] = None,
+    ) -> List[Dict]:
+        """
+        Articles published in [start, end] that match the FTS5 query match,
+        best BM25 rank first, plus the ones NewsAPI itself returned for
+        query_key (NewsAPI searches full bodies, the store only has the
+        first 200 characters).
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT a.*, f.rank AS rank, q.position AS position
+                FROM articles a
+                LEFT JOIN (
+                    SELECT rowid, bm25(articles_fts, 4.0, 2.0, 1.0) AS rank
+                    FROM articles_fts WHERE articles_fts MATCH ?
+                ) f ON f.rowid = a.id
+                LEFT JOIN query_articles q
+                    ON q.article_id = a.id AND q.query_key = ?
+                WHERE a.published_day BETWEEN ? AND ?
+                    AND (f.rowid IS NOT NULL OR q.article_id IS NOT NULL)
+                ORDER BY COALESCE(f.rank, 0), q.position, a.published_at DESC
+                LIMIT ?
+                """,
+                (match, query_key, _day(start), _day(end), limit),
+            ).fetchall()
+        return [self._article(row) for row in rows]
+
+    @staticmethod
+    def _article(row: sqlite3.Row) -> Dict:
+        # Same shape as NewsAPI's own articles
+        return {
+            "source": {"id": None, "name": row["source"]},
+            "author": row["author"],
+            "title": row["title"],
+            "description": row["description"],
+            "url": row["url"],
+            "urlToImage": row["url_to_image"],
+            "publishedAt": row["published_at"],
+            "content": row["content"],
+        }
+
+    def _evict(self):
+        cutoff = _day(_today() - timedelta(days=self.max_age_days))
+        self._conn.execute("DELETE FROM articles WHERE published_day < ?", (cutoff,))
+        self._conn.execute("DELETE FROM coverage WHERE day < ?", (cutoff,))
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            articles = self._conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+            queries = self._conn.execute(
+                "SELECT COUNT(DISTINCT query_key) FROM coverage"
+            ).fetchone()[0]
+        return {**self.stats, "articles": articles, "queries": queries}
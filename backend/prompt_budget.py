@@ -0,0 +1,362 @@
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import tiktoken
+except ImportError:  # optional, token counts fall back to an estimate
+    tiktoken = None
+
+DEFAULT_TOKEN_BUDGET = 12000  # tokens for the whole prompt, document included
+DEFAULT_MAX_ARTICLES = 5
+DESCRIPTION_CHARS = 300
+EDGE_LINES = 2  # lines at the top and bottom of a page checked for headers/footers
+CHARS_PER_TOKEN = 4  # rough average for English text when tiktoken is missing
+BM25_K1 = 1.2  # term frequency saturation
+BM25_B = 0.75  # article length normalization
+
+_WORD = re.compile(r"[a-z][a-z0-9]{3,}")
+_TRUNCATED = re.compile(r"\s*\[\+\d+ chars\]$")
+_STOPWORDS = {
+    "about",
+    "after",
+    "also",
+    "been",
+    "from",
+    "have",
+    "into",
+    "more",
+    "most",
+    "over",
+    "said",
+    "such",
+    "than",
+    "that",
+    "their",
+    "them",
+    "then",
+    "there",
+    "these",
+    "they",
+    "this",
+    "were",
+    "what",
+    "when",
+    "which",
+    "will",
+    "with",
+    "would",
+    "your",
+}
+_encodings: Dict[str, object] = {}
+
+
+def count_tokens(text: str, model: str = "gpt-4o-mini") -> int:
+    """
+    Tokens text takes up for model, using tiktoken when it's installed and
+    a characters-per-token estimate otherwise.
+    """
+    if tiktoken is not None:
+        if model not in _encodings:
+            try:
+                _encodings[model] = tiktoken.encoding_for_model(model)
+            except KeyError:
+                _encodings[model] = tiktoken.get_encoding("o200k_base")
+        return len(_encodings[model].encode(text))
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: str = "gpt-4o-mini") -> str:
+    while text and count_tokens(text, model) > max_tokens:
+        # Shrink proportionally, ending on a word boundary
+        cut = int(len(text) * max_tokens / count_tokens(text, model) * 0.95)
+        text = text[:cut]
+        if " " in text:
+            text = text.rsplit(" ", 1)[0]
+    return text
+
+
+def compact_news(
+    subject_news: Optional[Dict], max_articles: int = DEFAULT_MAX_ARTICLES
+) -> List[Dict]:
+    """
+    Keep only the article fields the model uses (title, source, date,
+    description and link) and drop bodies, image URLs and source metadata.
+    """
+    articles = (subject_news or {}).get("articles") or []
+    compacted = []
+    seen_titles = set()
+    for article in articles:
+        title = " ".join((article.get("title") or "").split())
+        if not title or title.lower() in seen_titles or title == "[Removed]":
+            continue
+        seen_titles.add(title.lower())
+        description = " ".join((article.get("description") or "").split())
+        if len(description) > DESCRIPTION_CHARS:
+            description = description[:DESCRIPTION_CHARS].rsplit(" ", 1)[0] + "..."
+        compacted.append(
+            {
+                "title": title,
+                "source": (article.get("source") or {}).get("name") or "",
+                "published": (article.get("publishedAt") or "")[:10],
+                "description": description,
+                "link": article.get("url") or "",
+            }
+        )
+        if article.get("page"):
+            compacted[-1]["page"] = article["page"]
+        if len(compacted) >= max_articles:
+            break
+    return compacted
+
+
+def format_news(articles: List[Dict]) -> str:
+    if not articles:
+        return "(no recent articles found)"
+    lines = []
+    for article in articles:
+        meta = ", ".join(filter(None, [article["source"], article["published"]]))
+        line = f"- {article['title']}"
+        if meta:
+            line += f" ({meta})"
+        if article["description"]:
+            line += f": {article['description']}"
+        if article["link"]:
+            line += f" <{article['link']}>"
+        if article.get("page"):
+            line += f" [matches page {article['page']}]"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def _article_terms(article: Dict) -> List[str]:
+    # The title says most about what an article covers, so it counts twice
+    title = article.get("title") or ""
+    content = _TRUNCATED.sub("", article.get("content") or "")
+    return _terms(" ".join([title, title, article.get("description") or "", content]))
+
+
+def rank_news(subject_news: Optional[Dict], pages: List[str]) -> Dict:
+    """
+    Order candidate articles by BM25 relevance to the document, with the
+    articles as the corpus and the document text as the query, and drop
+    the ones that share no terms with it. Each kept article gets a
+    "relevance" score and the 1-based "page" it matches best. If no article
+    matches at all, the candidates are returned in their original order.
+    """
+    articles = (subject_news or {}).get("articles") or []
+    if not articles:
+        return subject_news or {}
+
+    docs = [_article_terms(article) for article in articles]
+    avg_len = sum(len(doc) for doc in docs) / len(docs) or 1
+    doc_freq = Counter(term for doc in docs for term in set(doc))
+    # Inverted index of term -> [(article, idf * saturated term frequency)], so
+    # scoring a query only touches the articles that contain its terms
+    postings: Dict[str, List[Tuple[int, float]]] = {}
+    for i, doc in enumerate(docs):
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * len(doc) / avg_len)
+        for term, freq in Counter(doc).items():
+            idf = math.log(
+                1 + (len(docs) - doc_freq[term] + 0.5) / (doc_freq[term] + 0.5)
+            )
+            weight = idf * freq * (BM25_K1 + 1) / (freq + norm)
+            postings.setdefault(term, []).append((i, weight))
+
+    def score(query: Counter) -> List[float]:
+        scores = [0.0] * len(docs)
+        for term, count in query.items():
+            for i, weight in postings.get(term, ()):
+                scores[i] += math.log1p(count) * weight
+        return scores
+
+    page_queries = [Counter(_terms(page)) for page in pages]
+    document_query: Counter = Counter()
+    for query in page_queries:
+        document_query.update(query)
+    totals = score(document_query)
+
+    best_pages = [0] * len(docs)
+    best_scores = [0.0] * len(docs)
+    for number, query in enumerate(page_queries, start=1):
+        for i, page_score in enumerate(score(query)):
+            if page_score > best_scores[i]:
+                best_scores[i], best_pages[i] = page_score, number
+
+    ranked = sorted(
+        (i for i in range(len(docs)) if totals[i] > 0), key=lambda i: (-totals[i], i)
+    )
+    if not ranked:
+        return subject_news
+    return {
+        **subject_news,
+        "articles": [
+            dict(articles[i], relevance=round(totals[i], 3), page=best_pages[i])
+            for i in ranked
+        ],
+    }
+
+
+def _boilerplate_key(line: str) -> str:
+    # Page numbers and dates change from page to page, the rest of a footer doesn't
+    return re.sub(r"\d+", "#", line.lower())
+
+
+def _edge_lines(lines: List[str]) -> List[str]:
+    return lines[:EDGE_LINES] + lines[-EDGE_LINES:]
+
+
+def clean_pages(pages: List[str]) -> List[str]:
+    """
+    Collapse repeated whitespace and drop header/footer lines that repeat on
+    most pages (e.g. "Course Title - Page 3 of 12"). Only the first and last
+    EDGE_LINES lines of a page are considered headers/footers.
+    """
+    split_pages = []
+    for page in pages:
+        lines = [" ".join(line.split()) for line in page.splitlines()]
+        split_pages.append([line for line in lines if line])
+
+    repeated = set()
+    if len(split_pages) >= 3:
+        counts = Counter(
+            key
+            for lines in split_pages
+            for key in {
+                _boilerplate_key(line)
+                for line in _edge_lines(lines)
+                if len(line) <= 120
+            }
+        )
+        repeated = {
+            key for key, count in counts.items() if count >= len(split_pages) / 2
+        }
+
+    cleaned = []
+    for lines in split_pages:
+        edges = set(range(EDGE_LINES)) | set(range(len(lines) - EDGE_LINES, len(lines)))
+        cleaned.append(
+            "\n".join(
+                line
+                for i, line in enumerate(lines)
+                if i not in edges or _boilerplate_key(line) not in repeated
+            )
+        )
+    return cleaned
+
+
+def _terms(text: str) -> List[str]:
+    return [word for word in _WORD.findall(text.lower()) if word not in _STOPWORDS]
+
+
+def _relevance(page: str, query_terms: Counter) -> float:
+    page_terms = Counter(_terms(page))
+    if not page_terms:
+        return 0.0
+    score = sum(
+        weight * math.log1p(page_terms[term]) for term, weight in query_terms.items()
+    )
+    # Don't let long pages win just by being long
+    return score / math.sqrt(sum(page_terms.values()))
+
+
+def fit_pages(
+    pages: List[str],
+    max_tokens: int,
+    query: str = "",
+    model: str = "gpt-4o-mini",
+) -> Tuple[List[Optional[str]], int]:
+    """
+    Pick the pages that fit in max_tokens, most relevant to query first,
+    and return them in document order with None for every page left out,
+    plus the tokens used. The first page (title, overview) is always kept.
+    """
+    costs = [count_tokens(page, model) for page in pages]
+    if sum(costs) <= max_tokens:
+        return list(pages), sum(costs)
+
+    query_terms = Counter(_terms(query))
+    order = sorted(
+        range(len(pages)),
+        key=lambda i: (i != 0, -_relevance(pages[i], query_terms), i),
+    )
+    kept: List[Optional[str]] = [None] * len(pages)
+    used = 0
+    for i in order:
+        if not pages[i]:
+            continue
+        if used + costs[i] <= max_tokens:
+            kept[i] = pages[i]
+            used += costs[i]
+        elif i == 0 or used == 0:
+            # Better part of the most important page than nothing at all
+            kept[i] = truncate_to_tokens(pages[i], max_tokens - used, model)
+            used += count_tokens(kept[i], model)
+    return kept, used
+
+
+def join_kept_pages(kept: List[Optional[str]], separator: str = "\n") -> str:
+    parts = []
+    skipped = 0
+    for page in kept:
+        if page is None:
+            skipped += 1
+            continue
+        if skipped:
+            parts.append(f"[... {skipped} less relevant page(s) omitted ...]")
+            skipped = 0
+        parts.append(page)
+    if skipped:
+        parts.append(f"[... {skipped} less relevant page(s) omitted ...]")
+    return (separator or "\n").join(parts)
+
+
+def build_prompt(
+    instructions: str,
+    pages: List[str],
+    heading: str,
+    subject_news: Optional[Dict] = None,
+    subject: str = "",
+    budget: int = DEFAULT_TOKEN_BUDGET,
+    separator: str = "\n",
+    model: str = "gpt-4o-mini",
+) -> Tuple[str, Dict]:
+    """
+    Build "<instructions>\\n\\n<heading>\\n<document text>" within budget
+    tokens. "{subject_news}" in instructions is replaced with the compacted
+    articles most relevant to the document. Document pages are cleaned of
+    boilerplate and, if they still don't fit, the pages least relevant to
+    the subject and news are left out. Returns the prompt and a report of
+    the token counts.
+    """
+    cleaned = clean_pages(pages)
+    articles = compact_news(rank_news(subject_news, cleaned))
+    news_text = format_news(articles)
+    template = f"{instructions}\n\n{heading}\n"
+    head = template.replace("{subject_news}", news_text)
+
+    # The uncompacted prompt: the news response as it used to be embedded
+    # (its repr) and the pages as extracted
+    raw_head = template.replace("{subject_news}", str(subject_news))
+    raw_tokens = count_tokens(raw_head, model) + sum(
+        count_tokens(page, model) for page in pages
+    )
+    query = " ".join([subject, subject] + [a["title"] for a in articles])
+    query += " " + " ".join(a["description"] for a in articles)
+    kept, _ = fit_pages(
+        cleaned, max(budget - count_tokens(head, model), 0), query, model
+    )
+    prompt = head + join_kept_pages(kept, separator)
+
+    report = {
+        "raw_tokens": raw_tokens,
+        "prompt_tokens": count_tokens(prompt, model),
+        "news_tokens": count_tokens(news_text, model),
+        "news_articles": len(articles),
+        "news_candidates": len((subject_news or {}).get("articles") or []),
+        "pages_total": len(pages),
+        "pages_kept": sum(page is not None for page in kept),
+        "budget": budget,
+    }
+    return prompt, report
@@ -0,0 +1,259 @@
+import io
+import os
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import PyPDF2
+from pdf2image import convert_from_path
+from PIL import Image, ImageDraw
+from pptx import Presentation
+from pptx.enum.shapes import MSO_SHAPE_TYPE
+
+DEFAULT_DPI = 200
+DEFAULT_FORMAT = "PNG"
+
+# Pages are handed to pdftoppm in small batches so that each page is rendered
+# once, without paying a process spawn per page or holding the whole document.
+PDF_BATCH_SIZE = 4
+
+EMU_PER_INCH = 914400
+SLIDE_DPI = 96
+
+MIME_TYPES = {"PNG": "image/png", "JPEG": "image/jpeg", "WEBP": "image/webp"}
+
+# Named render settings. PDF pages are rasterized at dpi; PPTX slides are
+# drawn at SLIDE_DPI. Either is then shrunk to fit max_size (longest side,
+# in pixels) and encoded as fmt at quality.
+DEFAULT_PROFILE = "original"
+RENDER_PROFILES = {
+    "original": {"dpi": DEFAULT_DPI, "max_size": None, "fmt": "PNG", "quality": None},
+    "viewer": {"dpi": 120, "max_size": 1600, "fmt": "WEBP", "quality": 80},
+    "thumbnail": {"dpi": 50, "max_size": 320, "fmt": "WEBP", "quality": 60},
+    # Under 1024px the vision model needs the fewest image tiles
+    "llm-vision": {"dpi": 100, "max_size": 1024, "fmt": "JPEG", "quality": 75},
+}
+
+
+def get_profile(name: Optional[str]) -> Dict:
+    if not name:
+        name = DEFAULT_PROFILE
+    if name not in RENDER_PROFILES:
+        raise ValueError(f"Unknown render profile: {name}")
+    return RENDER_PROFILES[name]
+
+
+def image_mime(data: bytes) -> str:
+    """MIME type of encoded image bytes, from their magic number"""
+    if data[:3] == b"\xff\xd8\xff":
+        return MIME_TYPES["JPEG"]
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return MIME_TYPES["WEBP"]
+    return MIME_TYPES["PNG"]
+
+
+def encode_image(
+    image,
+    fmt: str = DEFAULT_FORMAT,
+    quality: Optional[int] = None,
+    max_size: Optional[int] = None,
+) -> bytes:
+    """
+    Encode a PIL image as PNG, JPEG or WEBP bytes, first shrinking it so
+    its longest side is at most max_size pixels.
+    """
+    fmt = fmt.upper()
+    if fmt not in MIME_TYPES:
+        raise ValueError(f"Unsupported image format: {fmt}")
+    if max_size and max(image.size) > max_size:
+        ratio = max_size / max(image.size)
+        size = (max(round(image.width * ratio), 1), max(round(image.height * ratio), 1))
+        image = image.resize(size, Image.LANCZOS)
+    if fmt == "JPEG" and image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+
+    options = {}
+    if quality is not None and fmt != "PNG":
+        options["quality"] = quality
+
+    image_stream = io.BytesIO()
+    image.save(image_stream, format=fmt, **options)
+    return image_stream.getvalue()
+
+
+def get_pdf_page_count(pdf_path: str) -> int:
+    return len(PyPDF2.PdfReader(pdf_path).pages)
+
+
+def iter_pdf_pages(
+    pdf_path: str,
+    start: int = 0,
+    end: Optional[int] = None,
+    dpi: int = DEFAULT_DPI,
+    fmt: str = DEFAULT_FORMAT,
+    quality: Optional[int] = None,
+    page_count: Optional[int] = None,
+    max_size: Optional[int] = None,
+) -> Iterator[Tuple[int, bytes]]:
+    """
+    Rasterize pages [start, end) of a PDF, yielding (page_index, image_bytes).
+    Page indexes are zero-based. Every page is rendered exactly once and only
+    one batch of PIL images is alive at a time.
+    """
+    if page_count is None:
+        page_count = get_pdf_page_count(pdf_path)
+    if end is None or end > page_count:
+        end = page_count
+    if start < 0 or start >= end:
+        return
+
+    for batch_start in range(start, end, PDF_BATCH_SIZE):
+        batch_end = min(batch_start + PDF_BATCH_SIZE, end)
+        # pdf2image page numbers are one-based and inclusive
+        images = convert_from_path(
+            pdf_path, dpi=dpi, first_page=batch_start + 1, last_page=batch_end
+        )
+        for offset, image in enumerate(images):
+            yield batch_start + offset, encode_image(image, fmt, quality, max_size)
+            image.close()
+        del images
+
+
+def render_pdf_range(
+    pdf_path: str,
+    start: int,
+    end: int,
+    dpi: int = DEFAULT_DPI,
+    fmt: str = DEFAULT_FORMAT,
+    quality: Optional[int] = None,
+    page_count: Optional[int] = None,
+    max_size: Optional[int] = None,
+) -> List[Tuple[int, bytes]]:
+    """
+    Render pages [start, end) as a list, for running in a worker process.
+    """
+    return list(
+        iter_pdf_pages(
+            pdf_path, start, end, dpi, fmt, quality, page_count, max_size=max_size
+        )
+    )
+
+
+def _emu_to_px(value) -> int:
+    return int((value or 0) * SLIDE_DPI / EMU_PER_INCH)
+
+
+class SlideRenderer:
+    def __init__(self, pptx_path: str):
+        """
+        Parse a presentation once and render any of its slides from the
+        in-memory model. Picture blobs are decoded and resized once per
+        renderer, so logos repeated across slides are only processed once.
+        """
+        self.prs = Presentation(pptx_path)
+        self.width = _emu_to_px(self.prs.slide_width)
+        self.height = _emu_to_px(self.prs.slide_height)
+        self._decoded: Dict[str, Image.Image] = {}
+        self._resized: Dict[Tuple[str, int, int], Image.Image] = {}
+
+    def __len__(self) -> int:
+        return len(self.prs.slides)
+
+    def _get_picture(self, shape, size: Tuple[int, int]) -> Image.Image:
+        blob_key = shape.image.sha1
+        key = (blob_key, size[0], size[1])
+        if key not in self._resized:
+            if blob_key not in self._decoded:
+                image = Image.open(io.BytesIO(shape.image.blob))
+                image.load()
+                self._decoded[blob_key] = image
+            self._resized[key] = self._decoded[blob_key].resize(size)
+        return self._resized[key]
+
+    def render_image(self, slide_index: int = 0) -> Image.Image:
+        if slide_index < 0 or slide_index >= len(self.prs.slides):
+            raise ValueError("Slide index out of range")
+
+        slide = self.prs.slides[slide_index]
+        slide_image = Image.new("RGB", (self.width, self.height), "white")
+        draw = ImageDraw.Draw(slide_image)
+
+        for shape in slide.shapes:
+            left = _emu_to_px(shape.left)
+            top = _emu_to_px(shape.top)
+
+            # Handle text boxes
+            if hasattr(shape, "text"):
+                try:
+                    draw.text((left, top), shape.text, fill="black")
+                except Exception as e:
+                    print(f"Error drawing text: {e}")
+
+            # Handle pictures
+            if shape.shape_type == MSO_SHAPE_TYPE.PICTURE:
+                try:
+                    size = (_emu_to_px(shape.width), _emu_to_px(shape.height))
+                    slide_image.paste(self._get_picture(shape, size), (left, top))
+                except Exception as e:
+                    print(f"Error processing image: {e}")
+
+        return slide_image
+
+    def render(
+        self,
+        slide_index: int = 0,
+        fmt: str = DEFAULT_FORMAT,
+        quality: Optional[int] = None,
+        max_size: Optional[int] = None,
+    ) -> bytes:
+        return encode_image(self.render_image(slide_index), fmt, quality, max_size)
+
+    def iter_slides(
+        self,
+        start: int = 0,
+        end: Optional[int] = None,
+        fmt: str = DEFAULT_FORMAT,
+        quality: Optional[int] = None,
+        max_size: Optional[int] = None,
+    ) -> Iterator[Tuple[int, bytes]]:
+        """
+        Render slides [start, end), yielding (slide_index, image_bytes).
+        """
+        if end is None or end > len(self):
+            end = len(self)
+        for i in range(max(start, 0), end):
+            yield i, self.render(i, fmt, quality, max_size)
+
+
+def get_pptx_slide_count(pptx_path: str) -> int:
+    return len(Presentation(pptx_path).slides)
+
+
+# The deck each thread (in practice, each worker process) parsed last, so the
+# chunks of one deck that land on the same worker share one parse and its
+# decoded pictures
+_last_renderer = threading.local()
+
+
+def _renderer(pptx_path: str) -> SlideRenderer:
+    stat = os.stat(pptx_path)
+    key = (pptx_path, stat.st_mtime_ns, stat.st_size)
+    if getattr(_last_renderer, "key", None) != key:
+        _last_renderer.renderer = SlideRenderer(pptx_path)
+        _last_renderer.key = key
+    return _last_renderer.renderer
+
+
+def render_pptx_range(
+    pptx_path: str,
+    start: int,
+    end: int,
+    fmt: str = DEFAULT_FORMAT,
+    quality: Optional[int] = None,
+    max_size: Optional[int] = None,
+) -> List[Tuple[int, bytes]]:
+    """
+    Render slides [start, end) as a list, for running in a worker process.
+    The deck is parsed once per worker, not once per chunk.
+    """
+    renderer = _renderer(pptx_path)
+    return list(renderer.iter_slides(start, end, fmt, quality, max_size))
@@ -0,0 +1,201 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+DEFAULT_MEMORY_BYTES = 64 * 1024 * 1024
+
+
+def hash_file(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """
+    SHA-256 of a file's content, read in chunks.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def render_key(file_hash: str, **settings) -> str:
+    """
+    Cache namespace for one document rendered with one set of settings
+    (kind, dpi, format, quality, ...).
+    """
+    payload = json.dumps(settings, sort_keys=True)
+    return hashlib.sha256(f"{file_hash}:{payload}".encode("utf-8")).hexdigest()
+
+
+class RenderCache:
+    def __init__(
+        self,
+        cache_dir: str,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        memory_bytes: int = DEFAULT_MEMORY_BYTES,
+    ):
+        """
+        Content-addressed store for rendered slide images. Entries live on disk
+        under cache_dir with a small in-memory LRU in front. When the disk
+        usage goes over max_bytes the least recently used entries are evicted.
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.memory_bytes = memory_bytes
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_size = 0
+        self._disk: "OrderedDict[str, int]" = OrderedDict()
+        self._disk_size = 0
+        self.stats = {"hits": 0, "misses": 0, "memory_hits": 0, "evictions": 0}
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load_index()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key)
+
+    def _load_index(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            path = self._path(name)
+            if name.endswith(".tmp") or not os.path.isfile(path):
+                continue
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, name, stat.st_size))
+        for _, name, size in sorted(entries):
+            self._disk[name] = size
+            self._disk_size += size
+
+    def _remember(self, key: str, data: bytes):
+        if len(data) > self.memory_bytes:
+            return
+        if key in self._memory:
+            self._memory_size -= len(self._memory.pop(key))
+        self._memory[key] = data
+        self._memory_size += len(data)
+        while self._memory_size > self.memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_size -= len(evicted)
+
+    def _evict(self):
+        while self._disk_size > self.max_bytes and self._disk:
+            key, size = self._disk.popitem(last=False)
+            self._disk_size -= size
+            self.stats["evictions"] += 1
+            if key in self._memory:
+                self._memory_size -= len(self._memory.pop(key))
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    def contains(self, key: str) -> bool:
+        with self._lock:
+            return key in self._memory or key in self._disk
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._read(key, counted=True)
+
+    def _read(self, key: str, counted: bool) -> Optional[bytes]:
+        # Only page images count towards hits/misses, not metadata like counts
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self._disk.move_to_end(key)
+                if counted:
+                    self.stats["hits"] += 1
+                    self.stats["memory_hits"] += 1
+                return self._memory[key]
+            if key not in self._disk:
+                if counted:
+                    self.stats["misses"] += 1
+                return None
+
+        try:
+            with open(self._path(key), "rb") as f:
+                data = f.read()
+            os.utime(self._path(key))
+        except FileNotFoundError:
+            with self._lock:
+                self._disk_size -= self._disk.pop(key, 0)
+                if counted:
+                    self.stats["misses"] += 1
+            return None
+
+        with self._lock:
+            if key in self._disk:
+                self._disk.move_to_end(key)
+            self._remember(key, data)
+            if counted:
+                self.stats["hits"] += 1
+        return data
+
+    def put(self, key: str, data: bytes):
+        # Write to a temp file first so readers never see a partial entry
+        tmp_path = f"{self._path(key)}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, self._path(key))
+
+        with self._lock:
+            self._disk_size -= self._disk.pop(key, 0)
+            self._disk[key] = len(data)
+            self._disk_size += len(data)
+            self._remember(key, data)
+            self._evict()
+
+    def get_count(self, doc_key: str, compute: Callable[[], int]) -> int:
+        """
+        Page/slide count of a cached document, computed once.
+        """
+        key = f"{doc_key}-count"
+        data = self._read(key, counted=False)
+        if data is not None:
+            return int(data)
+        count = compute()
+        self.put(key, str(count).encode("utf-8"))
+        return count
+
+    def iter_pages(
+        self,
+        doc_key: str,
+        render_range: Callable[[int, int], Iterator[Tuple[int, bytes]]],
+        start: int,
+        end: int,
+    ) -> Iterator[Tuple[int, bytes]]:
+        """
+        Yield (index, image_bytes) for pages [start, end). Cached pages are
+        served directly; each run of consecutive missing pages is rendered
+        with a single render_range(run_start, run_end) call and stored.
+        """
+        index = start
+        while index < end:
+            data = self.get(f"{doc_key}-{index}")
+            if data is not None:
+                yield index, data
+                index += 1
+                continue
+
+            run_end = index + 1
+            while run_end < end and not self.contains(f"{doc_key}-{run_end}"):
+                run_end += 1
+            for page_index, image_data in render_range(index, run_end):
+                self.put(f"{doc_key}-{page_index}", image_data)
+                yield page_index, image_data
+            index = run_end
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "hit_rate": self.stats["hits"] / lookups if lookups else 0.0,
+                "entries": len(self._disk),
+                "bytes": self._disk_size,
+                "max_bytes": self.max_bytes,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_size,
+            }
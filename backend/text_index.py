@@ -0,0 +1,236 @@
+import hashlib
+from typing import Dict, List, Optional
+
+import PyPDF2
+from PyPDF2.generic import ArrayObject, DictionaryObject, IndirectObject, StreamObject
+from pptx import Presentation
+
+INDEX_VERSION = 5
+
+# Back-references from resources and annotations to the page tree
+_PDF_PARENT_KEYS = ("/Parent", "/P")
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _pdf_object_digest(ref: IndirectObject, digests: Dict) -> str:
+    """
+    Digest of an indirect object and everything it refers to, computed once
+    per document: fonts and images shared by many pages are hashed once.
+    """
+    key = (ref.idnum, ref.generation)
+    if key not in digests:
+        # Stands in for the object while it is hashed, so reference cycles end
+        digests[key] = f"<{ref.idnum}>"
+        digest = hashlib.sha256()
+        _pdf_hash_object(ref.get_object(), digest, digests)
+        digests[key] = digest.hexdigest()
+    return digests[key]
+
+
+def _pdf_hash_object(obj, digest, digests: Dict):
+    """
+    Feed obj into digest with everything it refers to resolved: fonts,
+    images, nested form XObjects, appearance streams. Other pages and the
+    page tree are left out, so a link to a page doesn't tie the two
+    fingerprints together.
+    """
+    if isinstance(obj, IndirectObject):
+        digest.update(_pdf_object_digest(obj, digests).encode("utf-8"))
+        return
+    if isinstance(obj, DictionaryObject):
+        if obj.get("/Type") in ("/Page", "/Pages"):
+            digest.update(b"<page>")
+            return
+        digest.update(b"<<")
+        for name in sorted(obj):
+            if name not in _PDF_PARENT_KEYS:
+                digest.update(name.encode("utf-8"))
+                _pdf_hash_object(obj.raw_get(name), digest, digests)
+        digest.update(b">>")
+        if isinstance(obj, StreamObject):
+            try:
+                digest.update(obj.get_data())
+            except Exception:
+                digest.update(b"<?>")
+    elif isinstance(obj, ArrayObject):
+        digest.update(b"[")
+        for item in obj:
+            _pdf_hash_object(item, digest, digests)
+        digest.update(b"]")
+    else:
+        digest.update(repr(obj).encode("utf-8"))
+
+
+def _pdf_fingerprint(page, digests: Dict) -> str:
+    """
+    Hash of everything a render of the page depends on: its content stream,
+    media and crop boxes, rotation, the resolved /Resources tree and its
+    annotations. digests carries the objects already hashed for earlier
+    pages of the document.
+    """
+    digest = hashlib.sha256()
+    contents = page.get_contents()
+    digest.update(contents.get_data() if contents is not None else b"")
+    digest.update(
+        f"{list(page.mediabox)}:{list(page.cropbox)}:{page.get('/Rotate', 0)}".encode(
+            "utf-8"
+        )
+    )
+    for key in ("/Resources", "/Annots"):
+        digest.update(key.encode("utf-8"))
+        _pdf_hash_object(page.raw_get(key) if key in page else None, digest, digests)
+    return digest.hexdigest()
+
+
+def _pdf_fingerprints(file_path: str) -> List[str]:
+    with open(file_path, "rb") as f:
+        pdf_reader = PyPDF2.PdfReader(f)
+        digests: Dict = {}
+        return [_pdf_fingerprint(page, digests) for page in pdf_reader.pages]
+
+
+def _pdf_sources(file_path: str):
+    with open(file_path, "rb") as f:
+        pdf_reader = PyPDF2.PdfReader(f)
+        for page in pdf_reader.pages:
+            yield lambda page=page: page.extract_text() or ""
+
+
+def _pptx_slide_text(slide) -> str:
+    slide_text = []
+    for shape in slide.shapes:
+        if hasattr(shape, "text"):
+            slide_text.append(shape.text)
+    return " ".join(slide_text)
+
+
+def _pptx_fingerprint(slide, slide_size: str) -> str:
+    """
+    Hash of the slide XML, the slide size and every part it uses (pictures,
+    media, layout), so replacing an image under the same name still counts
+    as a change. Speaker notes are left out; they aren't rendered or analyzed.
+    """
+    parts = [slide_size, _sha256(slide.part.blob)]
+    for rel_id, rel in sorted(slide.part.rels.items()):
+        if rel.is_external or rel.reltype.endswith("/notesSlide"):
+            continue
+        parts.append(f"{rel_id}:{_sha256(rel.target_part.blob)}")
+    return _sha256("\n".join(parts).encode("utf-8"))
+
+
+def _pptx_fingerprints(file_path: str) -> List[str]:
+    prs = Presentation(file_path)
+    slide_size = f"{prs.slide_width}x{prs.slide_height}"
+    return [_pptx_fingerprint(slide, slide_size) for slide in prs.slides]
+
+
+def _pptx_sources(file_path: str):
+    for slide in Presentation(file_path).slides:
+        yield lambda slide=slide: _pptx_slide_text(slide)
+
+
+def page_fingerprints(file_path: str) -> List[str]:
+    """
+    Fingerprint of every page or slide of a PDF or PPTX file, covering its
+    text and images, for comparing versions of a document.
+    """
+    extension = file_path.rsplit(".", 1)[1].lower()
+    if extension == "pptx":
+        return _pptx_fingerprints(file_path)
+    if extension == "pdf":
+        return _pdf_fingerprints(file_path)
+    raise Exception("Invalid file format")
+
+
+def build_text_index(file_path: str, reuse: Optional[Dict[int, str]] = None) -> Dict:
+    """
+    Per-page text index of a PDF or PPTX file:
+
+        {"pages": [{"page", "text", "start", "end", "hash"}],
+         "separator", "length", "reused"}
+
+    start/end are character offsets into the pages joined with separator.
+    reuse maps 0-based page indexes to text already known for them (e.g.
+    pages unchanged since the previous version of the file); those pages
+    aren't extracted again.
+    """
+    extension = file_path.rsplit(".", 1)[1].lower()
+    if extension == "pptx":
+        sources, separator = _pptx_sources(file_path), "\n"
+    elif extension == "pdf":
+        sources, separator = _pdf_sources(file_path), ""
+    else:
+        raise Exception("Invalid file format")
+    reuse = reuse or {}
+
+    pages: List[Dict] = []
+    offset = 0
+    reused = 0
+    for index, extract in enumerate(sources):
+        if index in reuse:
+            text = reuse[index]
+            reused += 1
+        else:
+            text = extract()
+        if pages:
+            offset += len(separator)
+        pages.append(
+            {
+                "page": index + 1,
+                "text": text,
+                "start": offset,
+                "end": offset + len(text),
+                "hash": _sha256(text.encode("utf-8")),
+            }
+        )
+        offset += len(text)
+
+    return {
+        "version": INDEX_VERSION,
+        "pages": pages,
+        "separator": separator,
+        "length": offset,
+        "reused": reused,
+    }
+
+
+def index_pages(index: Dict) -> List[str]:
+    return [page["text"] for page in index["pages"]]
+
+
+def index_text(index: Dict) -> str:
+    return index["separator"].join(index_pages(index))
+
+
+def diff_pages(old: List[str], new: List[str]) -> Dict:
+    """
+    Compare two versions' page fingerprints. Pages are matched by content,
+    so moved slides still count as unchanged:
+
+        {"unchanged": {new_index: old_index}, "changed": [new_index],
+         "removed": [old_index]}
+    """
+    positions: Dict[str, List[int]] = {}
+    for old_index, fingerprint in enumerate(old):
+        positions.setdefault(fingerprint, []).append(old_index)
+
+    unchanged: Dict[int, int] = {}
+    changed: List[int] = []
+    for new_index, fingerprint in enumerate(new):
+        candidates = positions.get(fingerprint)
+        if candidates:
+            # Prefer the same position, then the earliest unused match
+            old_index = new_index if new_index in candidates else candidates[0]
+            candidates.remove(old_index)
+            unchanged[new_index] = old_index
+        else:
+            changed.append(new_index)
+    matched = set(unchanged.values())
+    return {
+        "unchanged": unchanged,
+        "changed": changed,
+        "removed": [i for i in range(len(old)) if i not in matched],
+    }
@@ -0,0 +1,250 @@
+import math
+import multiprocessing
+import os
+import queue
+import resource
+import sys
+import threading
+from collections import deque
+from concurrent.futures import Future
+from contextlib import contextmanager
+from importlib.machinery import ModuleSpec
+from typing import Callable, Iterator, Optional, Tuple
+
+DEFAULT_TIMEOUT = 120  # seconds per task
+DEFAULT_MAX_RSS_MB = 1024
+DEFAULT_TASKS_PER_CHILD = 50
+MAX_CHUNK_PAGES = 4
+
+
+class TaskTimeout(Exception):
+    pass
+
+
+class WorkerCrashed(Exception):
+    pass
+
+
+def _worker_main(conn):
+    """
+    Entry point of a worker process: run (fn, args, kwargs) tasks from conn
+    until it is closed. Each reply also carries the worker's peak RSS so
+    the parent can replace workers that grew too large.
+    """
+    while True:
+        try:
+            fn, args, kwargs = conn.recv()
+        except EOFError:
+            return
+        try:
+            reply = (True, fn(*args, **kwargs))
+        except Exception as e:
+            reply = (False, e)
+        # ru_maxrss is in kilobytes on Linux
+        peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        try:
+            conn.send(reply + (peak_rss_mb,))
+        except Exception as e:
+            # The result or its exception can't be pickled
+            conn.send((False, RuntimeError(f"{type(e).__name__}: {e}"), peak_rss_mb))
+
+
+# Workers are started from several threads; __main__.__spec__ is swapped
+# for one of them at a time
+_main_spec_lock = threading.Lock()
+
+
+@contextmanager
+def _without_main_import():
+    """
+    A spawned process normally re-runs the parent's __main__ script first,
+    which under "python app.py" would start a second copy of the app (job
+    threads, stores, pools) in every worker. Workers only run functions
+    from importable modules, so spawn is told there is no main module to
+    import while the process starts.
+    """
+    with _main_spec_lock:
+        main = sys.modules["__main__"]
+        spec = getattr(main, "__spec__", None)
+        main.__spec__ = ModuleSpec("__main__", None)
+        try:
+            yield
+        finally:
+            main.__spec__ = spec
+
+
+class _Worker:
+    def __init__(self, context):
+        """One worker process and the pipe its tasks go through"""
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main, args=(child_conn,), daemon=True
+        )
+        with _without_main_import():
+            self.process.start()
+        child_conn.close()
+        self.tasks = 0
+
+    def stop(self, kill: bool = False):
+        if kill:
+            self.process.kill()
+        self.conn.close()  # an idle worker exits when its pipe closes
+        self.process.join(5)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+
+
+class DocumentWorkerPool:
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        timeout: float = DEFAULT_TIMEOUT,
+        max_rss_mb: float = DEFAULT_MAX_RSS_MB,
+        tasks_per_child: int = DEFAULT_TASKS_PER_CHILD,
+    ):
+        """
+        Process pool for CPU-bound document work (rasterization, PIL drawing,
+        image encoding, text extraction) so it runs outside the Flask
+        request threads and the GIL. Every worker process is fed by its own
+        thread, one task at a time. A task that runs past timeout, counted
+        from when its worker picks it up, kills only that worker; workers
+        whose peak memory goes over max_rss_mb, or that have run
+        tasks_per_child tasks, are replaced after their task. workers=0
+        runs every task inline instead.
+        """
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.timeout = timeout
+        self.max_rss_mb = max_rss_mb
+        self.tasks_per_child = tasks_per_child
+        # spawn: forking a threaded Flask process is unsafe
+        self._context = multiprocessing.get_context("spawn")
+        self._tasks: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._threads = []
+        self.stats = {"tasks": 0, "timeouts": 0, "crashes": 0, "recycles": 0}
+
+    def _start(self):
+        with self._lock:
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(
+                    target=self._serve,
+                    name=f"document-worker-{len(self._threads)}",
+                    daemon=True,
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def _serve(self):
+        """Feed one worker process; replace it when it dies, hangs or wears out"""
+        worker = None
+        while True:
+            future, fn, args, kwargs = self._tasks.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                if worker is None:
+                    worker = _Worker(self._context)
+                worker.conn.send((fn, args, kwargs))
+            except (OSError, EOFError) as e:
+                # The worker died while idle, e.g. killed for memory
+                if worker is not None:
+                    worker.stop(kill=True)
+                    worker = None
+                future.set_exception(WorkerCrashed(f"Document worker failed: {e}"))
+                continue
+            except Exception as e:
+                # fn or its arguments can't be pickled; the worker is fine
+                future.set_exception(e)
+                continue
+
+            if not worker.conn.poll(self.timeout):
+                worker.stop(kill=True)
+                worker = None
+                with self._lock:
+                    self.stats["timeouts"] += 1
+                future.set_exception(
+                    TaskTimeout(f"Document task took longer than {self.timeout}s")
+                )
+                continue
+            try:
+                ok, value, peak_rss_mb = worker.conn.recv()
+            except (OSError, EOFError):
+                worker.stop(kill=True)
+                worker = None
+                with self._lock:
+                    self.stats["crashes"] += 1
+                future.set_exception(
+                    WorkerCrashed("Document worker exited during its task")
+                )
+                continue
+
+            worker.tasks += 1
+            with self._lock:
+                self.stats["tasks"] += 1
+            if peak_rss_mb > self.max_rss_mb or worker.tasks >= self.tasks_per_child:
+                worker.stop()
+                worker = None
+                with self._lock:
+                    self.stats["recycles"] += 1
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+    def submit(self, fn: Callable, *args, **kwargs):
+        """
+        Queue fn(*args, **kwargs) for a worker and return a handle for result().
+        """
+        if self.workers == 0:
+            return _InlineTask(fn, args, kwargs)
+        self._start()
+        future: Future = Future()
+        self._tasks.put((future, fn, args, kwargs))
+        return future
+
+    def run(self, fn: Callable, *args, **kwargs):
+        return self.submit(fn, *args, **kwargs).result()
+
+    def iter_page_chunks(
+        self, fn: Callable, file_path: str, start: int, end: int, **kwargs
+    ) -> Iterator[Tuple[int, bytes]]:
+        """
+        Spread fn(file_path, chunk_start, chunk_end, **kwargs) over the
+        workers and yield the (index, image_bytes) pages in order. Only a
+        couple of chunks per worker are in flight at a time, so memory stays
+        bounded for large documents.
+        """
+        pages = max(end - start, 0)
+        workers = max(self.workers, 1)
+        chunk = max(1, min(MAX_CHUNK_PAGES, math.ceil(pages / workers)))
+        ranges = deque((i, min(i + chunk, end)) for i in range(start, end, chunk))
+
+        in_flight = deque()
+        try:
+            while ranges or in_flight:
+                while ranges and len(in_flight) < 2 * workers:
+                    chunk_start, chunk_end = ranges.popleft()
+                    in_flight.append(
+                        self.submit(fn, file_path, chunk_start, chunk_end, **kwargs)
+                    )
+                for page in in_flight.popleft().result():
+                    yield page
+        finally:
+            # Chunks nobody will read any more, e.g. the client went away
+            for task in in_flight:
+                task.cancel()
+
+    def get_stats(self):
+        return {**self.stats, "workers": self.workers, "queued": self._tasks.qsize()}
+
+
+class _InlineTask:
+    def __init__(self, fn: Callable, args: Tuple, kwargs: dict):
+        self.result_value = fn(*args, **kwargs)
+
+    def result(self):
+        return self.result_value
+
+    def cancel(self):
+        return False
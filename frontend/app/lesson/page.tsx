@@ -23,6 +23,10 @@ export default function SyllabusUpload() {
   const [slideImages, setSlideImages] = useState<string[]>([])
   const [currentSlide, setCurrentSlide] = useState(0)
   const [suggestions, setSuggestions] = useState<SlideSuggestion[]>([])
+  // Server-side ID of the uploaded file, so it is only uploaded once
+  const [documentId, setDocumentId] = useState<string | null>(null)
+  // The deck this one replaced, so the server only re-analyzes changed slides
+  const [previousDocumentId, setPreviousDocumentId] = useState<string | null>(null)
   const router = useRouter()
   const suggestionsRef = useRef<HTMLDivElement>(null)
 
@@ -30,6 +34,7 @@ export default function SyllabusUpload() {
     if (e.target.files && e.target.files[0]) {
       const file = e.target.files[0]
       setFile(file)
+      setDocumentId(null)
 
       const fileExtension = file.name.split('.').pop()?.toLowerCase()
       if (fileExtension === 'pdf') {
@@ -42,27 +47,35 @@ export default function SyllabusUpload() {
     }
   }
 
-  const handlePdfConversion = async (file: File) => {
+  // Only the page count and page URLs are fetched up front; the viewer loads
+  // each slide image when it is shown and the server prefetches the next ones
+  const openDocument = async (file: File) => {
     const formData = new FormData()
     formData.append('file', file)
-    formData.append('subject', subject)
+    if (documentId) {
+      formData.append('previous_document_id', documentId)
+    }
 
-    try {
-      const response = await fetch('http://127.0.0.1:5000/convert-pdf', {
-        method: 'POST',
-        body: formData,
-      })
+    const response = await fetch('http://127.0.0.1:5000/documents?render_profile=viewer', {
+      method: 'POST',
+      body: formData,
+    })
+    const data = await response.json()
+    if (!response.ok || data.error) {
+      throw new Error(data.error || `HTTP error! status: ${response.status}`)
+    }
 
-      if (!response.ok) {
-        throw new Error(`HTTP error! status: ${response.status}`)
-      }
+    if (data.document_id !== documentId) {
+      setPreviousDocumentId(documentId)
+    }
+    setDocumentId(data.document_id)
+    setCurrentSlide(0)
+    setSlideImages(data.pages.map((url: string) => `http://127.0.0.1:5000${url}`))
+  }
 
-      const data = await response.json()
-      if (data.slides && Array.isArray(data.slides)) {
-        setSlideImages(data.slides)
-      } else {
-        throw new Error('Invalid response format for PDF')
-      }
+  const handlePdfConversion = async (file: File) => {
+    try {
+      await openDocument(file)
     } catch (error) {
       console.error('Error converting PDF:', error)
       alert('Error converting PDF file: ' + (error instanceof Error ? error.message : 'Unknown error'))
@@ -71,33 +84,8 @@ export default function SyllabusUpload() {
   }
 
   const handlePptxConversion = async (file: File) => {
-    const formData = new FormData()
-    formData.append('file', file)
-    formData.append('subject', subject)
-
     try {
-      const response = await fetch('http://127.0.0.1:5000/convert-pptx', {
-        method: 'POST',
-        body: formData,
-      })
-      
-      if (!response.ok) {
-        throw new Error(`HTTP error! status: ${response.status}`)
-      }
-      
-      const data = await response.json()
-      console.log('Received slides data:', data) // Debug log
-      
-      if (data.slides && Array.isArray(data.slides)) {
-        setSlideImages(data.slides)
-        if (data.slides.length === 0) {
-          console.warn('No slides were converted')
-        }
-      } else {
-        console.error('Invalid response format:', data)
-        throw new Error('Invalid response format')
-      }
-
+      await openDocument(file)
     } catch (error) {
       console.error('Error converting PPTX:', error)
       alert('Error converting PowerPoint file: ' + (error instanceof Error ? error.message : 'Unknown error'))
@@ -107,6 +95,7 @@ export default function SyllabusUpload() {
 
   const handleDeleteFile = () => {
     setFile(null)
+    setDocumentId(null)
     setPdfUrl(null)
     setSuggestion(null)
     setFileType(null)
@@ -126,8 +115,16 @@ export default function SyllabusUpload() {
 
     setLoading(true)
     const formData = new FormData()
-    formData.append('file', file)
+    if (documentId) {
+      formData.append('document_id', documentId)
+    } else {
+      formData.append('file', file)
+    }
+    if (previousDocumentId) {
+      formData.append('previous_document_id', previousDocumentId)
+    }
     formData.append('subject', subject)
+    formData.append('mode', 'per-slide')
 
     try {
       const suggestionResponse = await fetch('http://127.0.0.1:5000/lesson-plan', {
@@ -141,7 +138,16 @@ export default function SyllabusUpload() {
 
       const suggestionData = await suggestionResponse.json()
       
-      if (suggestionData.suggestion) {
+      if (suggestionData.suggestion && suggestionData.mode === 'per-slide') {
+        // Per-slide mode already returns parsed suggestions for every slide
+        setSuggestions(suggestionData.suggestion)
+        setTimeout(() => {
+          suggestionsRef.current?.scrollIntoView({
+            behavior: 'smooth',
+            block: 'start'
+          })
+        }, 100)
+      } else if (suggestionData.suggestion) {
         try {
           const parsedSuggestions = typeof suggestionData.suggestion[0].suggestions[0].content === 'string' 
             ? suggestionData.suggestion[0].suggestions[0].content.replace(/\\/g, '').replace(/^"/, '').replace(/"$/, '')
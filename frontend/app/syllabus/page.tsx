@@ -28,6 +28,41 @@ export default function SyllabusUpload() {
     setSuggestion(null)
   }
 
+  // Show the suggestion as the model writes it ("token" events), then the final text
+  const readSuggestionEvents = async (response: Response) => {
+    // Errors found before the stream starts come back as plain JSON
+    if (!response.ok) {
+      const data = await response.json().catch(() => ({}))
+      throw new Error(data.error || `HTTP error! status: ${response.status}`)
+    }
+    if (!response.body) return
+    const reader = response.body.getReader()
+    const decoder = new TextDecoder()
+    let buffer = ''
+    let text = ''
+    while (true) {
+      const { done, value } = await reader.read()
+      if (done) break
+      buffer += decoder.decode(value, { stream: true })
+      const events = buffer.split('\n\n')
+      buffer = events.pop() || ''
+      for (const raw of events) {
+        const event = raw.match(/^event: (.*)$/m)?.[1]
+        const data = raw.match(/^data: (.*)$/m)?.[1]
+        if (!event || !data) continue
+        const payload = JSON.parse(data)
+        if (event === 'token') {
+          text += payload.text
+          setSuggestion(text)
+        } else if (event === 'done') {
+          setSuggestion(payload.suggestion)
+        } else if (event === 'error') {
+          throw new Error(payload.error)
+        }
+      }
+    }
+  }
+
   const handleUpload = async () => {
     if (!file) {
       alert('Please upload a syllabus file first')
@@ -54,27 +89,27 @@ export default function SyllabusUpload() {
         body: formData,
       })
       const uploadData = await uploadResponse.json()
-      
-      if (uploadData.filename) {
+      if (!uploadResponse.ok || uploadData.error) {
+        throw new Error(uploadData.error || `HTTP error! status: ${uploadResponse.status}`)
+      }
+
+      if (uploadData.document_id) {
         const suggestionResponse = await fetch('http://127.0.0.1:5000/content-suggest', {
           method: 'POST',
           headers: {
             'Content-Type': 'application/json',
           },
           body: JSON.stringify({
-            filename: uploadData.filename,
-            subject: subject
+            document_id: uploadData.document_id,
+            subject: subject,
+            stream: 'sse'
           }),
         })
-        const suggestionData = await suggestionResponse.json()
-        
-        if (suggestionData.suggestion) {
-          setSuggestion(suggestionData.suggestion)
-        }
+        await readSuggestionEvents(suggestionResponse)
       }
     } catch (error) {
       console.error('Error processing file:', error)
-      alert('Error processing file. Please try again.')
+      alert('Error processing file: ' + (error instanceof Error ? error.message : 'Unknown error'))
     } finally {
       setLoading(false)
     }